@@ -0,0 +1,72 @@
+"""
+Measures the memory used per object and the handler records allocated per dispatch.
+Usage: python benchmarks/memory.py [objects]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("memory_benchmark", MessageCluster)
+
+
+@registry.register(1)
+class PlainObject(MessageObject):
+    pass
+
+
+@registry.register(2)
+class SlottedObject(MessageObject):
+    __slots__ = ()
+
+
+@registry.register(3)
+class ListenerObject(MessageObject):
+    @listen("tick")
+    def tick(self, value):
+        pass
+
+
+def memory_per_object(object_type: int, objects: int) -> float:
+    cluster = MessageCluster(registry)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(objects):
+        registry.create_and_insert(object_type, cluster, f"child{i}")
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / objects
+
+
+def records_per_dispatch(listeners: int) -> tuple[float, float]:
+    """
+    Counts the handler records that are replaced by a single emit, and the time it takes.
+    """
+
+    cluster = MessageCluster(registry)
+    for i in range(listeners):
+        registry.create_and_insert(3, cluster, f"child{i}")
+    handlers = cluster.listener_storage["tick"]
+    before = dict(handlers)
+    cluster.emit("tick", 1)
+    replaced = sum(1 for obj, record in handlers.items() if record is not before[obj])
+    number = max(1, 100000 // listeners)
+    elapsed = min(timeit.repeat(lambda: cluster.emit("tick", 1), number=number, repeat=5)) / number
+    return replaced / listeners, elapsed
+
+
+def main():
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for name, object_type in (("plain", 1), ("slotted", 2), ("listener", 3)):
+        print(f"{name:>10}: {memory_per_object(object_type, objects):8.1f} bytes per object")
+    replaced, elapsed = records_per_dispatch(100)
+    print(f"{'emit':>10}: {replaced:8.1f} records allocated per listener, {elapsed * 1e6:8.2f} us for 100 listeners")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Measures the hot paths of a cluster at different scales, and compares the results with a stored baseline.
+Every scenario is timed as the best of several runs, and the peak memory allocated by a single run is reported too.
+Usage:
+    python benchmarks/suite.py [--sizes N ...] [--fan-outs N ...] [--full] [--repeats N]
+                               [--output results.json] [--baseline baseline.json] [--threshold 0.2]
+The exit code is 1 if any scenario is slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from collections import deque
+from typing import Callable
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math, replace
+from pycluster.messenger.message_object import FizzleReplace, MessageObject, WrappedObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("suite_benchmark", MessageCluster)
+
+DefaultSizes = [10**2, 10**3, 10**4]
+FullSizes = [10**2, 10**3, 10**4, 10**5, 10**6]
+DefaultFanOuts = [1, 10, 10**2, 10**3, 10**4]
+
+
+@registry.register(1)
+class BenchmarkObject(MessageObject):
+    def __init__(self, parent=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.value = 0
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+    @listen("tick")
+    def tick(self, value):
+        self.value = value
+
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + 1
+
+    @replace("attack")
+    def attack(self, *args, **kwargs):
+        # fizzles, so that every replacer is visited
+        return FizzleReplace
+
+
+def wrapped_tree(nodes: int, branching: int = 10) -> WrappedObject:
+    """
+    Builds a wrapped cluster of the given number of nodes, every node having up to `branching` children.
+    The cluster has a single child, "top", which holds the rest of the nodes.
+    """
+
+    top = (1, 0, {})
+    root = (0, None, {"top": top})
+    queue = deque([top])
+    count = 2
+    while count < nodes:
+        parent = queue.popleft()
+        for _ in range(min(branching, nodes - count)):
+            child = (1, count, {})
+            parent[2][f"node{count}"] = child
+            queue.append(child)
+            count += 1
+    return root
+
+
+def flat_cluster(listeners: int) -> MessageCluster:
+    cluster = MessageCluster(registry)
+    registry.create_many(cluster, [(1, f"child{i}") for i in range(listeners)])
+    return cluster
+
+
+# Every scenario prepares a run for the given size, and returns the call to time and whether it can be repeated
+# on the same state. Calls that cannot be repeated are prepared again for every run.
+Scenario = Callable[[int], tuple[Callable[[], None], bool]]
+
+
+def prepare_emit(listeners: int):
+    cluster = flat_cluster(listeners)
+    return lambda: cluster.emit("tick", 1), True
+
+
+def prepare_calculate(listeners: int):
+    cluster = flat_cluster(listeners)
+    return lambda: cluster.calculate("damage", 0), True
+
+
+def prepare_run_replace(listeners: int):
+    cluster = flat_cluster(listeners)
+    return lambda: cluster.run_replace("attack"), True
+
+
+def prepare_wrap(nodes: int):
+    cluster = registry.unwrap(wrapped_tree(nodes))
+    return cluster.wrap, True
+
+
+def prepare_unwrap(nodes: int):
+    wrapped = wrapped_tree(nodes)
+    return lambda: registry.unwrap(wrapped), True
+
+
+def prepare_copy(nodes: int):
+    # copies the subtree below the cluster, as clusters need a registry to be created
+    cluster = registry.unwrap(wrapped_tree(nodes))
+    return cluster["top"].copy, True
+
+
+def prepare_cleanup(nodes: int):
+    cluster = registry.unwrap(wrapped_tree(nodes))
+    return cluster.cleanup, False
+
+
+def prepare_create_and_insert(nodes: int):
+    cluster = MessageCluster(registry)
+
+    def create():
+        for i in range(nodes):
+            registry.create_and_insert(1, cluster, f"child{i}")
+
+    return create, False
+
+
+# the scenarios with the name of the parameter they are scaled by
+FanOutScenarios: dict[str, Scenario] = {
+    "emit": prepare_emit,
+    "calculate": prepare_calculate,
+    "run_replace": prepare_run_replace,
+}
+SizeScenarios: dict[str, Scenario] = {
+    "wrap": prepare_wrap,
+    "unwrap": prepare_unwrap,
+    "copy": prepare_copy,
+    "cleanup": prepare_cleanup,
+    "create_and_insert": prepare_create_and_insert,
+}
+
+
+def measure(scenario: Scenario, size: int, repeats: int) -> dict[str, float]:
+    """
+    Times a scenario as the best of several runs, then measures the peak memory of a single run with tracemalloc,
+    which is kept separate because tracing slows the run down.
+    """
+
+    best = float("inf")
+    call, repeatable = scenario(size)
+    for i in range(repeats):
+        if repeatable:
+            number, elapsed = timeit.Timer(call).autorange()
+            best = min(best, elapsed / number)
+        else:
+            if i:
+                call, _ = scenario(size)
+            best = min(best, timeit.timeit(call, number=1))
+
+    call, _ = scenario(size)
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def run(sizes: list[int], fan_outs: list[int], repeats: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for scenarios, parameter, values in (
+        (FanOutScenarios, "listeners", fan_outs),
+        (SizeScenarios, "nodes", sizes),
+    ):
+        for name, scenario in scenarios.items():
+            for value in values:
+                key = f"{name}/{parameter}={value}"
+                results[key] = measure(scenario, value, repeats)
+                print(
+                    f"{key:>32}: {results[key]['seconds'] * 1e6:14.2f} us, "
+                    f"peak {results[key]['peak_bytes'] / 1024:12.1f} KiB",
+                    flush=True,
+                )
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """
+    Compares the results with the baseline.
+    :return: the keys of the scenarios that are slower than the baseline by more than the threshold.
+    """
+
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+
+        ratio = result["seconds"] / expected["seconds"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:>32}: {ratio:6.2f}x baseline{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DefaultSizes, help="cluster sizes in nodes")
+    parser.add_argument("--fan-outs", type=int, nargs="+", default=DefaultFanOuts, help="listeners per event")
+    parser.add_argument("--full", action="store_true", help="scale clusters up to a million nodes")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per scenario, the best one is kept")
+    parser.add_argument("--output", help="the JSON file to write the results to")
+    parser.add_argument("--baseline", help="a JSON file written by a previous run to compare the results with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="the slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = run(FullSizes if args.full else args.sizes, args.fan_outs, args.repeats)
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
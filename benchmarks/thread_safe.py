@@ -0,0 +1,78 @@
+"""
+Compares the uncontended throughput of a thread-safe cluster with a regular one.
+Usage: python benchmarks/thread_safe.py [listeners] [repeats] [max_overhead]
+The exit code is 1 if the overhead of any call is above max_overhead percent, 5 by default.
+"""
+
+import sys
+import timeit
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("thread_safe_benchmark", MessageCluster)
+
+
+@registry.register(1)
+class BenchmarkObject(MessageObject):
+    @listen("tick")
+    def tick(self, value):
+        pass
+
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + 1
+
+
+def construct_tree(thread_safe: bool, listeners: int) -> MessageCluster:
+    cluster = MessageCluster(registry, thread_safe=thread_safe)
+    for i in range(listeners):
+        registry.create_and_insert(1, cluster, f"child{i}")
+    return cluster
+
+
+def measure(listeners: int, repeats: int) -> dict[str, dict[bool, float]]:
+    """
+    Measures both modes in alternation, so that both are equally affected by noise, and keeps the best run.
+    """
+
+    clusters = {thread_safe: construct_tree(thread_safe, listeners) for thread_safe in (False, True)}
+    calls = {
+        "emit": lambda cluster: lambda: cluster.emit("tick", 1),
+        "calculate": lambda cluster: lambda: cluster.calculate("damage", 1),
+    }
+    number = max(1, 100000 // listeners)
+    results = {name: {False: float("inf"), True: float("inf")} for name in calls}
+    for _ in range(repeats):
+        for name, call in calls.items():
+            for thread_safe, cluster in clusters.items():
+                elapsed = timeit.timeit(call(cluster), number=number) / number
+                results[name][thread_safe] = min(results[name][thread_safe], elapsed)
+    return results
+
+
+def main():
+    listeners = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    max_overhead = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+    results = measure(listeners, repeats)
+    print(f"{listeners} listeners, best of {repeats}")
+    failed = []
+    for name, result in results.items():
+        overhead = (result[True] / result[False] - 1) * 100
+        if overhead > max_overhead:
+            failed.append(name)
+        print(
+            f"{name:>10}: regular {result[False] * 1e6:8.2f} us, "
+            f"thread-safe {result[True] * 1e6:8.2f} us, overhead {overhead:+.1f}%"
+            f"{'  ABOVE THE BAR' if overhead > max_overhead else ''}"
+        )
+    if failed:
+        print(f"overhead above {max_overhead:g}%: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the binary wire format with pickling the wrapped tuples.
+Usage: python benchmarks/wire_format.py [nodes...]
+"""
+
+import pickle
+import sys
+import timeit
+
+from pycluster.messenger import wire_format
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("wire_format_benchmark", MessageCluster)
+
+
+@registry.register(1)
+class BenchmarkObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self.value = value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+def construct_tree(nodes: int) -> MessageCluster:
+    """
+    Builds a tree of zones with 100 entities each, every entity having a small datagram and a few children.
+    """
+
+    cluster = MessageCluster(registry)
+    created = 0
+    zone_id = 0
+    while created < nodes:
+        zone = registry.create_and_insert(1, cluster, f"zone{zone_id}", value=zone_id)
+        zone_id += 1
+        created += 1
+        for entity_id in range(min(100, (nodes - created) // 4 + 1)):
+            entity = registry.create_and_insert(1, zone, f"npc{entity_id}", value=(entity_id, 100, "idle"))
+            for item in ("weapon", "armor", "ring"):
+                registry.create_and_insert(1, entity, item, value=None)
+            created += 4
+    return cluster
+
+
+def best(callable_, repeats: int = 3) -> float:
+    return min(timeit.repeat(callable_, number=1, repeat=repeats))
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [1000, 10000, 100000]
+    for nodes in sizes:
+        wrapped = construct_tree(nodes).wrap()
+        pickled = pickle.dumps(wrapped, pickle.HIGHEST_PROTOCOL)
+        encoded = wire_format.encode(wrapped)
+        print(f"{nodes} nodes")
+        print(f"  size:   pickle {len(pickled):>10} B, wire {len(encoded):>10} B ({len(encoded) / len(pickled):.0%})")
+        print(
+            f"  encode: pickle {best(lambda: pickle.dumps(wrapped, pickle.HIGHEST_PROTOCOL)) * 1e3:8.2f} ms, "
+            f"wire {best(lambda: wire_format.encode(wrapped)) * 1e3:8.2f} ms"
+        )
+        print(
+            f"  decode: pickle {best(lambda: pickle.loads(pickled)) * 1e3:8.2f} ms, "
+            f"wire {best(lambda: wire_format.decode(encoded)) * 1e3:8.2f} ms"
+        )
+        print(
+            f"  unwrap: pickle {best(lambda: registry.unwrap(pickle.loads(pickled))) * 1e3:8.2f} ms, "
+            f"wire {best(lambda: registry.unwrap_bytes(encoded)) * 1e3:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    from pycluster.messenger.message_object import MessageObject
+
+
+class CallbackDefinition:
+    """
+    A callback registered on an event, together with the arguments it is called with.
+    The limit is the number of calls left and is counted down in place. Only positive limits are counted,
+    callbacks registered with any other limit are unlimited and skip the bookkeeping.
+    """
+
+    __slots__ = ("callback", "limit", "args", "kwargs", "pass_object", "priority")
+
+    def __init__(
+        self,
+        callback: callable,
+        limit: int = -1,
+        args: Sequence = (),
+        kwargs: dict = None,
+        pass_object: bool = False,
+        priority: float = 0,
+    ):
+        self.callback = callback
+        self.limit = limit if limit > 0 else -1
+        self.args = args
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.pass_object = pass_object
+        self.priority = priority
+
+    def __call__(self, obj: "MessageObject", *args, **kwargs):
+        """
+        Calls the callback without counting the call towards the limit.
+        :param obj: the subscribed object, passed to the callback if pass_object is set.
+        :return: the result of the callback.
+        """
+
+        if self.pass_object:
+            return self.callback(obj, *self.args, *args, **self.kwargs, **kwargs)
+        return self.callback(*self.args, *args, **self.kwargs, **kwargs)
+
+    def __iter__(self):
+        return iter((self.callback, self.limit, self.args, self.kwargs, self.pass_object, self.priority))
+
+    def __repr__(self):
+        return f"CallbackDefinition({self.callback!r}, limit={self.limit}, priority={self.priority})"
+
+
+class CallbackDict(dict):
+    """
+    CallbackDict stores the callbacks registered on a single event, keyed by the subscribed object.
+    Unlike a plain dictionary, it also remembers the order in which the callbacks have to be called.
+    The order is calculated lazily and only recalculated after the set of callbacks has changed,
+    so that emitting an event does not have to sort the callbacks every time.
+    Ties between callbacks of the same priority are resolved in insertion order.
+    When `compiled` is set, calculations use `chain`, a single callable built from the callbacks,
+    which is dropped together with the cached order. `version` is increased on every change.
+    """
+
+    __slots__ = ("_ordered", "compiled", "chain", "version")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ordered: dict[bool, list["MessageObject"]] = {}
+        self.compiled = False
+        self.chain: Optional[callable] = None
+        self.version = 0
+
+    def ordered(self, reverse: bool = False) -> list["MessageObject"]:
+        """
+        Gets the subscribed objects sorted by the priority of their callbacks.
+        The returned list must not be modified, as it is shared between calls.
+        :param reverse: whether higher priority callbacks should come first.
+        :return: the list of subscribed objects.
+        """
+
+        order = self._ordered.get(reverse)
+        if order is None:
+            order = [obj for obj, _ in sorted(self.items(), key=lambda x: x[1].priority, reverse=reverse)]
+            self._ordered[reverse] = order
+        return order
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached dispatch order and the compiled chain.
+        Called automatically whenever the dictionary is modified.
+        :return: nothing
+        """
+
+        self._ordered = {}
+        self.chain = None
+        self.version += 1
+
+    def __setitem__(self, key: "MessageObject", value: CallbackDefinition) -> None:
+        super().__setitem__(key, value)
+        self.invalidate()
+
+    def __delitem__(self, key: "MessageObject") -> None:
+        super().__delitem__(key)
+        self.invalidate()
+
+    def pop(self, *args):
+        self.invalidate()
+        return super().pop(*args)
+
+    def popitem(self):
+        self.invalidate()
+        return super().popitem()
+
+    def setdefault(self, key: "MessageObject", default: CallbackDefinition = None):
+        self.invalidate()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self.invalidate()
+
+    def clear(self) -> None:
+        super().clear()
+        self.invalidate()
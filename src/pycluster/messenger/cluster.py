@@ -1,16 +1,85 @@
 import abc
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 
 from pycluster.messenger.message_object import MessageObject
 from pycluster.messenger.object_registry import ObjectRegistry
+from pycluster.util.action_lock import ThreadSafeActionLock
 
 
 class MessageCluster(MessageObject, abc.ABC):
     object_type: int = 0
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, registry: ObjectRegistry, thread_safe: bool = False):
+        """
+        :param registry: the registry used to create the objects of this cluster.
+        :param thread_safe: whether the cluster can be used from multiple threads at once.
+        In this mode, emitting, calculating and changing the listeners is guarded by a reentrant lock.
+        Changing the tree structure itself is not guarded.
+        """
 
-    def __init__(self, registry: ObjectRegistry):
         super().__init__()
-        self._registry = registry
+        self.registry = registry
+        if thread_safe:
+            self.cluster_state.action_lock = ThreadSafeActionLock()
+
+    @property
+    def thread_safe(self) -> bool:
+        """
+        Whether this cluster was created in the thread-safe mode.
+        """
+
+        return isinstance(self.action_lock, ThreadSafeActionLock)
 
     @property
-    def registry(self) -> ObjectRegistry:
-        return self._registry
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Gets the executor of this cluster, a single worker thread that runs the submitted calls one by one.
+        Submitting calls lets any thread use the cluster without contending for the storages.
+        :return: the executor.
+        """
+
+        if self._executor is None:
+            with self.action_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pycluster")
+        return self._executor
+
+    def submit(self, method: callable, *args, **kwargs) -> Future:
+        """
+        Run a callable on the executor of this cluster.
+        :param method: the callable to run.
+        :param args: the args to pass to the callable.
+        :param kwargs: the kwargs to pass to the callable.
+        :return: the future of the result.
+        """
+
+        return self.executor.submit(method, *args, **kwargs)
+
+    def submit_emit(self, event: int | str, *args, **kwargs) -> Future:
+        """
+        Emit an event on the executor of this cluster.
+        :return: the future that is done once the event was emitted.
+        """
+
+        return self.submit(self.emit, event, *args, **kwargs)
+
+    def submit_calculate(self, target: int | str, init_value, **kwargs) -> Future:
+        """
+        Calculate a target on the executor of this cluster.
+        :return: the future of the resultant value.
+        """
+
+        return self.submit(self.calculate, target, init_value, **kwargs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the executor of this cluster, if it was started.
+        :param wait: whether to wait for the submitted calls to finish.
+        :return: nothing
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,278 @@
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Hashable, Iterable, Optional
+
+from pycluster.messenger.message_object import MessageObject, WrappedObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+EmptyCluster: WrappedObject = (0, None, {})
+
+
+class _WorkerState:
+    def __init__(self, registries: Iterable[ObjectRegistry]):
+        self.registries = {registry.name: registry for registry in registries}
+        self.clusters: dict[Hashable, MessageObject] = {}
+
+    def add(self, cluster_id: Hashable, registry_name: str, wrapped: WrappedObject) -> None:
+        if cluster_id in self.clusters:
+            raise KeyError(f"Cluster {cluster_id!r} already exists")
+        self.clusters[cluster_id] = self.registries[registry_name].unwrap(wrapped)
+
+    def remove(self, cluster_id: Hashable) -> WrappedObject:
+        cluster = self.clusters.pop(cluster_id)
+        wrapped = cluster.wrap()
+        cluster.cleanup()
+        return wrapped
+
+    def discard(self, cluster_id: Hashable) -> None:
+        self.clusters.pop(cluster_id).cleanup()
+
+    def wrap(self, cluster_id: Hashable) -> WrappedObject:
+        return self.clusters[cluster_id].wrap()
+
+    def emit(self, cluster_id: Hashable, event: int | str, args: tuple, kwargs: dict) -> None:
+        self.clusters[cluster_id].emit(event, *args, **kwargs)
+
+    def calculate(self, cluster_id: Hashable, target: int | str, init_value, kwargs: dict):
+        return self.clusters[cluster_id].calculate(target, init_value, **kwargs)
+
+    def apply(self, cluster_id: Hashable, function: callable, args: tuple, kwargs: dict):
+        return function(self.clusters[cluster_id], *args, **kwargs)
+
+
+def _serve(connection, registries: list[ObjectRegistry]) -> None:
+    logger = logging.getLogger("pycluster.messenger.ClusterPool.worker")
+    state = _WorkerState(registries)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        command, args, reply = message
+        try:
+            result = getattr(state, command)(*args)
+        except Exception as e:
+            if reply:
+                connection.send((False, e))
+            else:
+                logger.exception(f"Command {command} failed in worker {os.getpid()}")
+            continue
+
+        if reply:
+            connection.send((True, result))
+
+
+class _Worker:
+    def __init__(self, context, registries: list[ObjectRegistry]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_connection, registries), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.lock = threading.Lock()
+        self.clusters: set[Hashable] = set()
+
+    def request(self, command: str, *args, reply: bool = True):
+        with self.lock:
+            self.connection.send((command, args, reply))
+            if not reply:
+                return None
+            success, result = self.connection.recv()
+        if not success:
+            raise result
+        return result
+
+    def close(self) -> None:
+        with self.lock:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join()
+        self.connection.close()
+
+
+class ClusterPool:
+    """
+    ClusterPool runs many independent clusters on a set of worker processes, so that they are not limited
+    by a single GIL. Every cluster lives on exactly one worker, and calls for it are routed to that worker.
+    The registries are sent to every worker once, when it is started, and are referred to by name afterwards.
+    Clusters are moved between workers by wrapping them on one worker and unwrapping them on another,
+    so only the state kept in datagrams survives a move.
+    Every argument and result has to be picklable.
+    """
+
+    logger = logging.getLogger("pycluster.messenger.ClusterPool")
+
+    def __init__(self, registries: Iterable[ObjectRegistry], workers: Optional[int] = None, context: str = None):
+        """
+        :param registries: the registries the clusters can be created from.
+        :param workers: the number of worker processes, defaults to the number of CPUs.
+        :param context: the multiprocessing start method, defaults to the platform default.
+        """
+
+        registries = list(registries)
+        self.registry_names = {registry.name for registry in registries}
+        context = multiprocessing.get_context(context)
+        self.workers = [_Worker(context, registries) for _ in range(workers or os.cpu_count() or 1)]
+        self.placement: dict[Hashable, int] = {}
+        self.cluster_registries: dict[Hashable, str] = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, cluster_id: Hashable) -> bool:
+        return cluster_id in self.placement
+
+    def __len__(self) -> int:
+        return len(self.placement)
+
+    def __worker(self, cluster_id: Hashable) -> _Worker:
+        try:
+            return self.workers[self.placement[cluster_id]]
+        except KeyError:
+            raise KeyError(f"Cluster {cluster_id!r} is not in the pool") from None
+
+    def add_cluster(
+        self, cluster_id: Hashable, registry: ObjectRegistry, wrapped: WrappedObject = EmptyCluster, worker: int = None
+    ) -> int:
+        """
+        Create a cluster on one of the workers.
+        :param cluster_id: the id of the new cluster.
+        :param registry: the registry to create the cluster with, has to be one of the registries of the pool.
+        :param wrapped: the wrapped cluster to unwrap, an empty cluster by default.
+        :param worker: the index of the worker to place the cluster on, the least loaded one by default.
+        :return: the index of the worker the cluster was placed on.
+        """
+
+        if registry.name not in self.registry_names:
+            raise ValueError(f"Registry {registry.name} is not registered in the pool")
+
+        with self.lock:
+            if cluster_id in self.placement:
+                raise KeyError(f"Cluster {cluster_id!r} is already in the pool")
+            if worker is None:
+                worker = min(range(len(self.workers)), key=lambda i: len(self.workers[i].clusters))
+            self.workers[worker].request("add", cluster_id, registry.name, wrapped)
+            self.workers[worker].clusters.add(cluster_id)
+            self.placement[cluster_id] = worker
+            self.cluster_registries[cluster_id] = registry.name
+        return worker
+
+    def remove_cluster(self, cluster_id: Hashable) -> WrappedObject:
+        """
+        Remove a cluster from the pool and clean it up.
+        :param cluster_id: the id of the cluster.
+        :return: the wrapped cluster as it was before being removed.
+        """
+
+        with self.lock:
+            worker = self.__worker(cluster_id)
+            wrapped = worker.request("remove", cluster_id)
+            worker.clusters.discard(cluster_id)
+            del self.placement[cluster_id]
+            del self.cluster_registries[cluster_id]
+        return wrapped
+
+    def wrap(self, cluster_id: Hashable) -> WrappedObject:
+        """
+        Wrap a cluster.
+        :param cluster_id: the id of the cluster.
+        :return: the wrapped cluster.
+        """
+
+        return self.__worker(cluster_id).request("wrap", cluster_id)
+
+    def emit(self, cluster_id: Hashable, event: int | str, *args, wait: bool = True, **kwargs) -> None:
+        """
+        Emit an event in a cluster.
+        :param cluster_id: the id of the cluster.
+        :param event: the event to emit.
+        :param wait: whether to wait for the event to be processed. If not, errors are only logged by the worker.
+        :return: nothing
+        """
+
+        self.__worker(cluster_id).request("emit", cluster_id, event, args, kwargs, reply=wait)
+
+    def calculate(self, cluster_id: Hashable, target: int | str, init_value, **kwargs):
+        """
+        Calculate a target in a cluster.
+        :param cluster_id: the id of the cluster.
+        :param target: the recalculation target name.
+        :param init_value: the initial value without any calculation changes.
+        :return: the resultant value
+        """
+
+        return self.__worker(cluster_id).request("calculate", cluster_id, target, init_value, kwargs)
+
+    def apply(self, cluster_id: Hashable, function: callable, *args, **kwargs):
+        """
+        Call a function with a cluster as its first argument on the worker the cluster lives on.
+        The function has to be picklable, i.e. defined at the top level of a module.
+        :param cluster_id: the id of the cluster.
+        :param function: the function to call.
+        :return: the result of the function.
+        """
+
+        return self.__worker(cluster_id).request("apply", cluster_id, function, args, kwargs)
+
+    def move(self, cluster_id: Hashable, worker: int) -> None:
+        """
+        Move a cluster to a different worker.
+        The cluster is only removed from its worker once the target worker has added it,
+        so it stays where it was if adding it fails.
+        :param cluster_id: the id of the cluster.
+        :param worker: the index of the worker to move the cluster to.
+        :return: nothing
+        """
+
+        with self.lock:
+            source = self.__worker(cluster_id)
+            target = self.workers[worker]
+            if source is target:
+                return
+
+            wrapped = source.request("wrap", cluster_id)
+            target.request("add", cluster_id, self.cluster_registries[cluster_id], wrapped)
+            target.clusters.add(cluster_id)
+            self.placement[cluster_id] = worker
+            source.request("discard", cluster_id)
+            source.clusters.discard(cluster_id)
+
+    def rebalance(self) -> int:
+        """
+        Move clusters from the most loaded workers to the least loaded ones, until the number of clusters
+        on any two workers differs by at most one.
+        :return: the number of clusters moved.
+        """
+
+        moved = 0
+        while True:
+            counts = [len(worker.clusters) for worker in self.workers]
+            busiest = max(range(len(counts)), key=counts.__getitem__)
+            idlest = min(range(len(counts)), key=counts.__getitem__)
+            if counts[busiest] - counts[idlest] <= 1:
+                return moved
+
+            self.move(next(iter(self.workers[busiest].clusters)), idlest)
+            moved += 1
+
+    def close(self) -> None:
+        """
+        Stop all workers. The clusters are lost, wrap them first if needed.
+        :return: nothing
+        """
+
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+        self.placement = {}
+        self.cluster_registries = {}
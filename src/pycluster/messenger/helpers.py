@@ -1,12 +1,22 @@
-from pycluster.messenger.message_object import MessageObject
+from typing import Optional
+
+from pycluster.messenger.message_object import HandlerAttribute
+
+
+def _declare(callback: callable, storage_name: Optional[str], event: Optional[int | str], *args) -> callable:
+    # adds a handler declaration to the method, the class collects it in MessageObject.__init_subclass__()
+    declarations = callback.__dict__.setdefault(HandlerAttribute, [])
+    declarations.append((storage_name, event, *args))
+    return callback
 
 
 def listen(event: int | str, *args, limit: int = -1, priority: float = 0, **kwargs):
     """
     Decorator for event listeners. The decorated method will be called when the event is emitted on the cluster.
-    Caveats due to implementation details (same for math):
-    1) it is not possible to ignore() events made by this decorator during __init__(), use post_init
-    2) has to be re-decorated again if it's overridden by an inheriting class.
+    The listeners of a class are collected once, when the class is created, and all of them are registered
+    at the start of __init__(), so they can be ignored during __init__() already.
+    An overriding method inherits the listeners of the method it overrides, unless it is decorated itself.
+    The method may be a coroutine function, in which case the event has to be emitted with emit_async().
     :param event: the event name to listen for
     :param args: additional arguments to pass to the method
     :param limit: the number of times to listen for the event. -1 for unlimited.
@@ -15,60 +25,37 @@ def listen(event: int | str, *args, limit: int = -1, priority: float = 0, **kwar
     :return: the decorator for the method
     """
 
-    class Listener:
-        def __init__(self, callback):
-            self.callback = callback
-
-        def __set_name__(self, owner, name):
-            old_init = owner.__init__
-
-            def new_init(obj: MessageObject, *iargs, **ikwargs):
-                old_init(obj, *iargs, **ikwargs)
-                obj.listen_to(event, self.callback, limit=limit, pass_object=True, priority=priority, *args, **kwargs)
-
-            owner.__init__ = new_init
+    def decorator(callback: callable):
+        return _declare(callback, "listener_storage", event, args, kwargs, limit, priority)
 
-            setattr(owner, name, self.callback)
-
-    return Listener
+    return decorator
 
 
-def math(target: int | str, *args, limit: int = -1, priority: float = 0, **kwargs):
+def math(target: int | str, *args, limit: int = -1, priority: float = 0, array_safe: bool = False, **kwargs):
     """
     Decorator for math handlers. The decorated method will be called when the math recalculation is requested.
-    NOTE: see caveats for listen()
+    NOTE: registered the same way as listen(). Coroutine functions require calculate_async().
     :param target: the recalculation target name to listen for
     :param args: additional arguments to pass to the method
     :param limit: the number of times to listen for the event. -1 for unlimited.
     :param priority: the priority of the listener. Higher priority calculators are called later.
+    :param array_safe: whether the method can process a whole NumPy array of values in calculate_batch().
     :param kwargs: additional keyword arguments to pass to the method
     :return: the decorator for the method
     """
 
-    class Calculator:
-        def __init__(self, callback):
-            self.callback = callback
-
-        def __set_name__(self, owner, name):
-            old_init = owner.__init__
-
-            def new_init(obj: MessageObject, *iargs, **ikwargs):
-                old_init(obj, *iargs, **ikwargs)
-                obj.register_math(
-                    target, self.callback, limit=limit, pass_object=True, priority=priority, *args, **kwargs
-                )
-
-            owner.__init__ = new_init
-
-            setattr(owner, name, self.callback)
+    def decorator(callback: callable):
+        if array_safe:
+            callback.array_safe = True
+        return _declare(callback, "math_storage", target, args, kwargs, limit, priority)
 
-    return Calculator
+    return decorator
 
 
 def replace(funcname: int | str, *args, limit: int = -1, priority: float = 0, **kwargs):
     """
     Decorator for method replacers.
-    NOTE: see caveats for listen()
+    NOTE: registered the same way as listen()
     :param funcname: the callback name to replace
     :param args: additional arguments to pass to the method
     :param limit: the number of times to listen for the event. -1 for unlimited.
@@ -77,50 +64,25 @@ def replace(funcname: int | str, *args, limit: int = -1, priority: float = 0, **
     :return: the decorator for the method
     """
 
-    class Replacer:
-        def __init__(self, callback):
-            self.callback = callback
-
-        def __set_name__(self, owner, name):
-            old_init = owner.__init__
-
-            def new_init(obj: MessageObject, *iargs, **ikwargs):
-                old_init(obj, *iargs, **ikwargs)
-                obj.register_replace(
-                    funcname, self.callback, limit=limit, pass_object=True, priority=priority, *args, **kwargs
-                )
+    def decorator(callback: callable):
+        return _declare(callback, "repl_storage", funcname, args, kwargs, limit, priority)
 
-            owner.__init__ = new_init
-
-            setattr(owner, name, self.callback)
-
-    return Replacer
+    return decorator
 
 
 def post_init(*args, **kwargs):
     """
-    Decorator for post_init methods. The decorated method will be called after the object is fully initialized.
+    Decorator for post_init methods. The decorated method will be called after the object is fully initialized,
+    i.e. once the __init__() of its actual class has returned.
     :param args: additional arguments to pass to the method
     :param kwargs: additional keyword arguments to pass to the method
     :return: the decorator for the method
     """
 
-    class PostInit:
-        def __init__(self, callback):
-            self.callback = callback
+    def decorator(callback: callable):
+        return _declare(callback, None, None, args, kwargs, -1, 0)
 
-        def __set_name__(self, owner, name):
-            old_init = owner.__init__
-
-            def new_init(obj: MessageObject, *iargs, **ikwargs):
-                old_init(obj, *iargs, **ikwargs)
-                self.callback(obj, *args, **kwargs)
-
-            owner.__init__ = new_init
-
-            setattr(owner, name, self.callback)
-
-    return PostInit
+    return decorator
 
 
 def replaceable(name: int | str):
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from pycluster.messenger.callback_dict import CallbackDict
+
+# handlers of the target at the time of calculation, their version and the invalidation epoch of the target
+Dependency = tuple[Optional[CallbackDict], int, int]
+
+
+class _Frame:
+    __slots__ = ("dependencies", "cacheable")
+
+    def __init__(self, target: int | str, dependency: Dependency, cacheable: bool):
+        self.dependencies = {target: dependency}
+        self.cacheable = cacheable
+
+
+class MathCache:
+    """
+    MathCache memoizes the results of calculate() within a cluster, evicting the least recently used results
+    once max_size is reached. A result depends on the handlers of its target and on every target that
+    was calculated while it was being evaluated, and it is dropped as soon as the handlers of any of those
+    targets change. Calculations involving handlers with a limit are never cached, as those have to be called.
+    Handlers that read any other state have to call invalidate() when that state changes.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, tuple[any, dict[int | str, Dependency]]] = OrderedDict()
+        self.epochs: dict[int | str, int] = {}
+        self.frames: list[_Frame] = []
+        self.hits = 0
+        self.misses = 0
+
+    def calculate(self, storage: dict[str, CallbackDict], target: int | str, init_value, kwargs: dict, evaluate):
+        """
+        Gets the cached result of a calculation, or evaluates and caches it.
+        :param storage: the math storage of the cluster.
+        :param target: the recalculation target name.
+        :param init_value: the initial value without any calculation changes.
+        :param kwargs: the kwargs of the calculation context.
+        :param evaluate: the callable to run the calculation with, called with the same arguments.
+        :return: the resultant value
+        """
+
+        handlers = storage.get(target)
+        dependency = (handlers, handlers.version if handlers is not None else 0, self.epochs.get(target, 0))
+        key = self.__key(target, init_value, kwargs)
+        if key is not None:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, dependencies = entry
+                if self.__is_valid(storage, dependencies):
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    if self.frames:
+                        self.frames[-1].dependencies.update(dependencies)
+                    return value
+                del self.entries[key]
+
+        self.misses += 1
+        limited = handlers is not None and any(definition.limit > 0 for definition in handlers.values())
+        frame = _Frame(target, dependency, key is not None and not limited)
+        self.frames.append(frame)
+        try:
+            value = evaluate(storage, target, init_value, kwargs)
+        finally:
+            self.frames.pop()
+
+        if self.frames:
+            parent = self.frames[-1]
+            parent.dependencies.update(frame.dependencies)
+            parent.cacheable = parent.cacheable and frame.cacheable
+        if frame.cacheable:
+            self.entries[key] = value, frame.dependencies
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *targets: int | str) -> None:
+        """
+        Drops the cached results depending on the given targets.
+        :param targets: the recalculation target names. If none are given, the whole cache is dropped.
+        :return: nothing
+        """
+
+        if not targets:
+            self.entries.clear()
+            return
+
+        for target in targets:
+            self.epochs[target] = self.epochs.get(target, 0) + 1
+
+    def __is_valid(self, storage: dict[str, CallbackDict], dependencies: dict[int | str, Dependency]) -> bool:
+        for target, (handlers, version, epoch) in dependencies.items():
+            current = storage.get(target)
+            if current is not handlers or (current is not None and current.version != version):
+                return False
+            if self.epochs.get(target, 0) != epoch:
+                return False
+        return True
+
+    @staticmethod
+    def __key(target: int | str, init_value, kwargs: dict) -> Optional[Hashable]:
+        key = target, type(init_value), init_value, tuple(sorted(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
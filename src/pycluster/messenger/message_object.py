@@ -1,7 +1,16 @@
+import asyncio
+import functools
+import inspect
+import itertools
 import logging
-import queue
-from typing import Optional, Sequence, TypeVar, TYPE_CHECKING
-
+import time
+from collections import deque
+from typing import Iterable, Iterator, Optional, Sequence, TypeVar, TYPE_CHECKING
+
+from pycluster.messenger.callback_dict import CallbackDefinition, CallbackDict
+from pycluster.messenger.math_cache import MathCache
+from pycluster.messenger.profiler import DispatchProfiler
+from pycluster.messenger.trace import EventTrace
 from pycluster.util.action_lock import ActionLock
 
 if TYPE_CHECKING:
@@ -9,13 +18,28 @@ if TYPE_CHECKING:
 
 WrappedChildren = dict[str, "WrappedObject"]
 WrappedObject = tuple[int, any, WrappedChildren]
-CallbackDefinition = tuple[callable, int, Sequence, dict, bool, float]
-ObjectCallbackDefinition = tuple["MessageObject", callable, int, Sequence, dict, bool, float]
-CallbackDict = dict["MessageObject", CallbackDefinition]
+# a single node of a wrapped object: its depth (0 for the root), its child id (None for the root), type and datagram
+WrappedRecord = tuple[int, Optional[str], int, any]
+# the changes of a node: whether its datagram changed, the datagram, the deltas of changed children,
+# the wrapped added children and the ids of the removed children
+WrappedDelta = tuple[bool, any, dict[str, "WrappedDelta"], WrappedChildren, tuple[str, ...]]
 
 V = TypeVar("V")
 
 
+# the attribute the decorators in helpers use to declare handlers on a method, see MessageObject.__init_subclass__()
+HandlerAttribute = "__message_handlers__"
+# a handler declared by a decorator: its storage (None for post_init), event, args, kwargs, limit and priority
+HandlerDeclaration = tuple[Optional[str], Optional[int | str], Sequence, dict, int, float]
+# a handler of a class, ready to be registered: its storage, event, callback, args, kwargs, limit and priority
+ClassHandler = tuple[str, int | str, callable, Sequence, dict, int, float]
+# the subscriptions of a pooled object to the handlers of its class: the state of its last cluster,
+# the handler tables with the records that were subscribed to them, and their (storage, event) pairs
+HandlerRecords = tuple["ClusterState", list[tuple[CallbackDict, CallbackDefinition]], set[tuple[str, int | str]]]
+
+# the storage of the handlers of every kind of dispatch
+KindStorages = {"emit": "listener_storage", "calculate": "math_storage", "run_replace": "repl_storage"}
+
 FizzleReplace = object()
 """
     A special value that can be returned from a replacement method to indicate that
@@ -23,46 +47,475 @@ FizzleReplace = object()
 """
 
 
+def iter_wrapped(wrapped: WrappedObject) -> Iterator[WrappedRecord]:
+    """
+    Converts a wrapped object into a stream of records, see MessageObject.unwrap_records().
+    :param wrapped: The wrapped object.
+    :return: the records of all nodes in depth-first order.
+    """
+
+    stack = [iter(((None, wrapped),))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        child_id, (object_type, datagram, children) = entry
+        yield len(stack) - 1, child_id, object_type, datagram
+        if children:
+            stack.append(iter(children.items()))
+
+
+class ClusterState:
+    """
+    The state shared by all objects of a cluster, which is only kept by the root of the cluster.
+    """
+
+    __slots__ = (
+        "listener_storage",
+        "math_storage",
+        "repl_storage",
+        "action_lock",
+        "math_cache",
+        "tracking",
+        "profiler",
+        "trace",
+        "path_index",
+        "type_index",
+    )
+
+    def __init__(self):
+        self.listener_storage: dict[int | str, CallbackDict] = {}
+        self.math_storage: dict[int | str, CallbackDict] = {}
+        self.repl_storage: dict[int | str, CallbackDict] = {}
+        self.action_lock = ActionLock()
+        self.math_cache: Optional[MathCache] = None
+        self.tracking = False
+        self.profiler: Optional[DispatchProfiler] = None
+        self.trace: Optional[EventTrace] = None
+        self.path_index: Optional[PathIndex] = None
+        self.type_index: Optional[TypeIndex] = None
+
+
+class PathIndex:
+    """
+    The paths of all objects of a cluster, see MessageObject.enable_path_index().
+    A path joins the child ids leading from the root to an object with "/", the root itself has the empty path.
+    """
+
+    __slots__ = ("paths", "nodes")
+
+    def __init__(self):
+        self.paths: dict[str, "MessageObject"] = {}
+        self.nodes: dict["MessageObject", str] = {}
+
+    def add(self, parent: "MessageObject", child_id: str, child: "MessageObject") -> None:
+        """
+        Adds a child with its whole subtree, if its parent is indexed.
+        """
+
+        prefix = self.nodes.get(parent)
+        if prefix is None:
+            return
+
+        stack = [(f"{prefix}/{child_id}" if prefix else child_id, child)]
+        while stack:
+            path, obj = stack.pop()
+            old = self.nodes.get(obj)
+            if old is not None and self.paths.get(old) is obj:
+                del self.paths[old]
+            self.paths[path] = obj
+            self.nodes[obj] = path
+            stack.extend((f"{path}/{child_id}", child) for child_id, child in obj.children.items())
+
+    def discard(self, obj: "MessageObject") -> None:
+        """
+        Removes a single object, its children are removed when they are cleaned up themselves.
+        """
+
+        path = self.nodes.pop(obj, None)
+        if path is not None and self.paths.get(path) is obj:
+            del self.paths[path]
+
+    def discard_subtree(self, obj: "MessageObject") -> None:
+        """
+        Removes an object with its whole subtree, e.g. when it is replaced by another child.
+        """
+
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            self.discard(obj)
+            stack.extend(obj.children.values())
+
+
+class TypeIndex:
+    """
+    The objects of a cluster by their object type, see MessageObject.enable_type_index().
+    The objects of a type are kept in a dict used as an ordered set, so they are found in the order they were added.
+    """
+
+    __slots__ = ("types",)
+
+    def __init__(self):
+        self.types: dict[int, dict["MessageObject", None]] = {}
+
+    def add(self, obj: "MessageObject") -> None:
+        """
+        Adds an object with its whole subtree.
+        """
+
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            objects = self.types.get(obj.object_type)
+            if objects is None:
+                objects = self.types[obj.object_type] = {}
+            objects[obj] = None
+            stack.extend(obj.children.values())
+
+    def discard(self, obj: "MessageObject") -> None:
+        """
+        Removes a single object, its children are removed when they are cleaned up themselves.
+        """
+
+        objects = self.types.get(obj.object_type)
+        if objects is not None:
+            objects.pop(obj, None)
+
+    def discard_subtree(self, obj: "MessageObject") -> None:
+        """
+        Removes an object with its whole subtree, e.g. when it is replaced by another child.
+        """
+
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            self.discard(obj)
+            stack.extend(obj.children.values())
+
+
+class ChangeSet:
+    """
+    The changes of a single object since the last checkpoint, see MessageObject.wrap_delta().
+    `dirty` holds the ids of the children that changed themselves or have changed children.
+    """
+
+    __slots__ = ("changed", "dirty", "added", "removed")
+
+    def __init__(self):
+        self.changed = False
+        self.dirty: set[str] = set()
+        self.added: set[str] = set()
+        self.removed: set[str] = set()
+
+
+class ObjectExtras:
+    """
+    The rarely used state of an object, which is kept out of the object itself to keep it small.
+    Objects without any such state share `NoExtras`, which is never modified.
+    """
+
+    __slots__ = ("registry", "cluster", "lazy", "changes")
+
+    def __init__(self):
+        self.registry: Optional["ObjectRegistry"] = None
+        # only set on the root, see MessageObject.cluster_state
+        self.cluster: Optional[ClusterState] = None
+        self.lazy: Optional[WrappedChildren] = None
+        # only set while change tracking is enabled
+        self.changes: Optional[ChangeSet] = None
+
+
+NoExtras = ObjectExtras()
+
+
 class MessageObject:
+    """
+    The base class of all objects in a cluster.
+    It uses __slots__, so subclasses that declare __slots__ as well do not carry a per-instance __dict__.
+    """
+
+    __slots__ = ("children", "_parent", "_root", "_child_id", "_subscriptions", "_extras")
+
     logger = logging.getLogger("pycluster.messenger.MessageObject")
 
     object_type: int = -1
     children: dict[str, "MessageObject"]
-    parent: "MessageObject"
-    _ls_storage = None
-    _mt_storage = None
-    _rm_storage = None
-    _act_lock = None
-    _registry = None
+    _parent: Optional["MessageObject"]
+    _root: "MessageObject"
+    _child_id: Optional[str]
+    _subscriptions: Optional[set[tuple[str, int | str]]]
+    _extras: ObjectExtras
+
+    # the handlers and post_init methods declared with the decorators in helpers, collected once per class
+    __handlers: tuple[ClassHandler, ...] = ()
+    __post_inits: tuple[tuple[callable, Sequence, dict], ...] = ()
 
     def __init__(self, parent: "MessageObject" = None, **kwargs):
         self.children = {}
+        self._parent = None
+        self._root = self
+        self._child_id = None
+        self._subscriptions = None
+        self._extras = NoExtras
         self.parent = parent
+        if self.__handlers:
+            self.__register_handlers()
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Collects the handlers declared with the decorators in helpers, including the inherited ones.
+        A method that is overridden without being decorated again keeps the handlers of the method it overrides,
+        while decorating the override replaces them.
+        """
+
+        super().__init_subclass__(**kwargs)
+        declared: dict[str, list[HandlerDeclaration]] = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                declarations = getattr(value, HandlerAttribute, None)
+                if declarations is not None:
+                    declared[name] = declarations
+
+        handlers = []
+        post_inits = []
+        for name, declarations in declared.items():
+            callback = getattr(cls, name, None)
+            if callback is None:
+                continue
+
+            for storage_name, event, args, kwargs, limit, priority in declarations:
+                if storage_name is None:
+                    post_inits.append((callback, args, kwargs))
+                else:
+                    handlers.append((storage_name, event, callback, args, kwargs, limit, priority))
+
+        cls.__handlers = tuple(handlers)
+        cls.__post_inits = tuple(post_inits)
+        if post_inits:
+            init = cls.__init__
+
+            @functools.wraps(init)
+            def init_with_post_init(self, *args, **kwargs):
+                init(self, *args, **kwargs)
+                # the post_init methods run once, after the __init__ of the actual class of the object
+                if type(self) is cls:
+                    for callback, cargs, ckwargs in cls.__post_inits:
+                        callback(self, *cargs, **ckwargs)
+
+            cls.__init__ = init_with_post_init
 
     def __getitem__(self, item) -> "MessageObject":
-        return self.children[str(item)]
+        item = str(item)
+        if self._extras.lazy and item in self._extras.lazy:
+            return self.__hydrate(item)
+        return self.children[item]
 
     def get(self, item) -> Optional["MessageObject"]:
-        return self.children.get(str(item))
+        item = str(item)
+        if self._extras.lazy and item in self._extras.lazy:
+            return self.__hydrate(item)
+        return self.children.get(item)
 
     def __iter__(self):
+        while self._extras.lazy:
+            self.__hydrate(next(iter(self._extras.lazy)))
         return iter(self.children.items())
 
     def __contains__(self, item):
-        return str(item) in self.children
+        item = str(item)
+        return item in self.children or bool(self._extras.lazy) and item in self._extras.lazy
+
+    def resolve(self, path: str | Sequence[str]) -> "MessageObject":
+        """
+        Gets a descendant of this object by its path, e.g. `cluster.resolve("zone/room/npc")`,
+        which is the same as `cluster["zone"]["room"]["npc"]`.
+        With the path index of the cluster enabled (see enable_path_index()), this is a single lookup.
+        :param path: the child ids joined with "/", or a sequence of child ids.
+        :return: the descendant.
+        """
+
+        if isinstance(path, str):
+            key = path
+            parts = path.split("/") if path else ()
+        else:
+            parts = [str(part) for part in path]
+            key = "/".join(parts)
+
+        state = self._root._extras.cluster
+        if state is not None and state.path_index is not None:
+            prefix = state.path_index.nodes.get(self)
+            if prefix is not None:
+                obj = state.path_index.paths.get(f"{prefix}/{key}" if prefix and key else prefix or key)
+                if obj is not None:
+                    return obj
+
+        # not indexed, or a placeholder of a lazy unwrap, which is hydrated by [] and indexed on the way
+        obj = self
+        for part in parts:
+            obj = obj[part]
+        return obj
+
+    def get_path(self) -> Optional[str]:
+        """
+        Gets the path of this object from the root of its cluster, see resolve().
+        :return: the path, or None if this object is not attached to the cluster.
+        """
+
+        state = self._root._extras.cluster
+        if state is not None and state.path_index is not None:
+            path = state.path_index.nodes.get(self)
+            if path is not None:
+                return path
+
+        parts = []
+        obj = self
+        while obj._parent is not None:
+            if obj._child_id is None or obj._parent.children.get(obj._child_id) is not obj:
+                return None
+            parts.append(obj._child_id)
+            obj = obj._parent
+        return "/".join(reversed(parts))
+
+    def enable_path_index(self) -> None:
+        """
+        Keep the paths of all objects of the cluster in an index, so that resolve() and get_path() do not depend
+        on how deep an object is. The index is kept up to date by add_child(), remove_child() and cleanup(),
+        and thereby by unwrap(). Placeholders of a lazy unwrap are indexed once they are hydrated.
+        Child ids must not contain "/".
+        :return: nothing
+        """
+
+        state = self.cluster_state
+        if state.path_index is not None:
+            return
+
+        index = PathIndex()
+        root = self._root
+        index.paths[""] = root
+        index.nodes[root] = ""
+        for child_id, child in root.children.items():
+            index.add(root, child_id, child)
+        state.path_index = index
+
+    def disable_path_index(self) -> None:
+        """
+        Drop the path index of the cluster.
+        :return: nothing
+        """
+
+        self.cluster_state.path_index = None
+
+    def enable_type_index(self) -> None:
+        """
+        Keep the objects of the cluster in an index by their object type, so that find_all() and count_objects()
+        do not have to walk the tree. The index is kept up to date by add_child() and cleanup(),
+        and thereby by ObjectRegistry.create_and_insert(), unwrap() and remove_child().
+        Placeholders of a lazy unwrap are indexed once they are hydrated.
+        :return: nothing
+        """
+
+        state = self.cluster_state
+        if state.type_index is None:
+            index = TypeIndex()
+            index.add(self._root)
+            state.type_index = index
+
+    def disable_type_index(self) -> None:
+        """
+        Drop the type index of the cluster.
+        :return: nothing
+        """
+
+        self.cluster_state.type_index = None
+
+    def find_all(self, object_type: int) -> list["MessageObject"]:
+        """
+        Find all objects of a type in the cluster, using the type index if it is enabled.
+        Without the index, the tree is walked, skipping the placeholders of a lazy unwrap.
+        :param object_type: the object type.
+        :return: the objects, in the order they were added to the index, or in depth-first order without it.
+        """
+
+        state = self._root._extras.cluster
+        if state is not None and state.type_index is not None:
+            return list(state.type_index.types.get(object_type, ()))
+
+        found = []
+        stack = [self._root]
+        while stack:
+            obj = stack.pop()
+            if obj.object_type == object_type:
+                found.append(obj)
+            stack.extend(reversed(obj.children.values()))
+        return found
+
+    def count_objects(self, object_type: int) -> int:
+        """
+        Count the objects of a type in the cluster, see find_all().
+        :param object_type: the object type.
+        :return: the number of objects.
+        """
+
+        state = self._root._extras.cluster
+        if state is not None and state.type_index is not None:
+            return len(state.type_index.types.get(object_type, ()))
+        return len(self.find_all(object_type))
 
     # Managing parent interaction
+    @property
+    def parent(self) -> Optional["MessageObject"]:
+        """
+        Gets the parent of this object.
+        :return: the parent object, or None if this object is the root of its cluster.
+        """
+
+        return self._parent
+
+    @parent.setter
+    def parent(self, value: Optional["MessageObject"]) -> None:
+        """
+        Sets the parent of this object, moving it with its subtree under a different root if needed.
+        :param value: the new parent object.
+        """
+
+        self._parent = value
+        self.__set_root(self if value is None else value._root)
+
+    def __set_root(self, root: "MessageObject") -> None:
+        stack = [self]
+        while stack:
+            obj = stack.pop()
+            if obj._root is root and obj is not self:
+                continue
+
+            obj._root = root
+            stack.extend(child for child in obj.children.values() if child._parent is obj)
+
     @property
     def parent_cluster(self) -> "MessageObject":
         """
-        Gets the parent cluster of this object. Will iterate multiple layers if needed.
+        Gets the parent cluster of this object. The root is cached on every object,
+        so this does not depend on how deep the object is.
         :return: the MessageCluster object.
         """
 
-        if self.parent is not None:
-            return self.parent.parent_cluster
+        return self._root
+
+    @property
+    def cluster_state(self) -> ClusterState:
+        """
+        Gets the state shared by the parent cluster, i.e. the storages and the listener lock.
+        :return: The state, which is kept by the root.
+        """
 
-        return self
+        root = self._root
+        state = root._extras.cluster
+        if state is None:
+            state = root.__own_extras().cluster = ClusterState()
+        return state
 
     @property
     def action_lock(self) -> ActionLock:
@@ -71,12 +524,7 @@ class MessageObject:
         :return: The listener lock.
         """
 
-        parent = self.parent_cluster
-        if parent is self:
-            if self._act_lock is None:
-                self._act_lock = ActionLock()
-            return self._act_lock
-        return parent.action_lock
+        return self.cluster_state.action_lock
 
     # Managing data
     @property
@@ -95,6 +543,13 @@ class MessageObject:
         :param value: The data for this object.
         """
 
+    def __own_extras(self) -> ObjectExtras:
+        # gives this object its own extras before they are modified
+        extras = self._extras
+        if extras is NoExtras:
+            extras = self._extras = ObjectExtras()
+        return extras
+
     @property
     def registry(self) -> "ObjectRegistry":
         """
@@ -102,9 +557,23 @@ class MessageObject:
         :return: The registry.
         """
 
-        if self._registry:
-            return self._registry
-        return self.parent_cluster.registry
+        registry = self._extras.registry
+        if registry:
+            return registry
+
+        root = self._root
+        if root is self:
+            return None
+        return root.registry
+
+    @registry.setter
+    def registry(self, value: "ObjectRegistry") -> None:
+        """
+        Sets the registry of this object, which is also used by the objects that do not have their own.
+        :param value: The registry.
+        """
+
+        self.__own_extras().registry = value
 
     # Managing hierarchy
     def add_child(self, child_id: str, child: "MessageObject", allow_subtrees: bool = False) -> "MessageObject":
@@ -115,9 +584,36 @@ class MessageObject:
         :param allow_subtrees: Whether to allow the child to have children from a different cluster.
         """
 
+        if child._parent is not self and child._parent is not None and child._child_id is None:
+            # the child was created for a different parent, but never attached to it, e.g. by copy_inplace()
+            child.parent = self
+        elif child._parent is self and child._root is not self._root:
+            # this object was moved after the child was created, but before the child was attached
+            child.__set_root(self._root)
         if not allow_subtrees:
-            assert child.parent_cluster is self.parent_cluster
+            assert child._root is self._root
+        if self._extras.lazy:
+            self._extras.lazy.pop(child_id, None)
+        if child._parent is self:
+            child._child_id = child_id
+        replaced = self.children.get(child_id)
         self.children[child_id] = child
+        state = self._root._extras.cluster
+        if state is not None:
+            if state.path_index is not None:
+                if replaced is not None and replaced is not child:
+                    state.path_index.discard_subtree(replaced)
+                state.path_index.add(self, child_id, child)
+            if state.type_index is not None:
+                if replaced is not None and replaced is not child:
+                    state.type_index.discard_subtree(replaced)
+                state.type_index.add(child)
+            if state.tracking:
+                changes = self.__change_set()
+                changes.added.add(child_id)
+                # the whole child is sent, so its own changes do not matter anymore
+                changes.dirty.discard(child_id)
+                self.__mark_path()
         return child
 
     def remove_child(self, child_id: str) -> None:
@@ -127,52 +623,350 @@ class MessageObject:
         :return: nothing
         """
 
+        if self._extras.lazy:
+            self._extras.lazy.pop(child_id, None)
         child = self.children.pop(child_id, None)
         if child:
             child.cleanup()
+        state = self._root._extras.cluster
+        if state is not None and state.tracking:
+            changes = self.__change_set()
+            changes.removed.add(child_id)
+            changes.added.discard(child_id)
+            changes.dirty.discard(child_id)
+            self.__mark_path()
 
     def wrap(self) -> WrappedObject:
         """
         Wraps the object, allowing it to be recreated elsewhere.
+        Children that were not hydrated yet are wrapped as they were given to unwrap().
         :return: The wrapped object representation.
         """
 
         children_wrapped = {child_id: child.wrap() for child_id, child in self.children.items()}
+        if self._extras.lazy:
+            children_wrapped.update(self._extras.lazy)
         return self.object_type, self.datagram, children_wrapped
 
-    def unwrap(self, wrapped: WrappedObject) -> None:
+    def unwrap(self, wrapped: WrappedObject, lazy: bool = False) -> None:
         """
         Unwrap a wrapped object and create any children objects that are needed.
         :param wrapped: The wrapped object to unwrap.
+        :param lazy: Whether to keep the children as placeholders, which are only turned into objects
+        when they are first accessed through [], get() or iteration, or by hydrate().
+        Objects of the eager types of the registry (and their ancestors) are always created,
+        as they may hold listeners that have to be registered right away.
         :return: nothing
         """
-        q: queue.Queue[tuple["MessageObject", str, int, any, WrappedChildren]] = queue.Queue()
+        self.__unwrap(wrapped, self.__eager_nodes(wrapped) if lazy else None)
+        self.mark_changed()
+
+    def __unwrap(self, wrapped: WrappedObject, eager: Optional[set[int]]) -> None:
+        # eager holds the ids of the wrapped nodes to create right away, or None to create all of them
+        q: deque[tuple["MessageObject", WrappedChildren]] = deque()
         self.datagram = wrapped[1]
-        for child_id, (child_type, data, children) in wrapped[2].items():
-            q.put((self, child_id, child_type, data, children))
+        if wrapped[2]:
+            q.append((self, wrapped[2]))
+
+        lazy = eager is not None
+        while q:
+            parent, children = q.popleft()
+            for child_id, child_wrapped in children.items():
+                child_type, data, grandchildren = child_wrapped
+                child = parent.get(child_id)
+                if child is None:
+                    if lazy and id(child_wrapped) not in eager:
+                        extras = parent.__own_extras()
+                        if extras.lazy is None:
+                            extras.lazy = {}
+                        extras.lazy[child_id] = child_wrapped
+                        continue
+
+                    child = parent.registry.create_object(child_type, parent)
+                    parent.add_child(child_id, child)
+                    child.datagram = data
+                else:
+                    # existing children are overwritten, which is a change, unlike the datagram of new children
+                    child.datagram = data
+                    child.mark_changed()
+                if grandchildren:
+                    q.append((child, grandchildren))
+
+    def hydrate(self) -> None:
+        """
+        Create all objects of this subtree that were left as placeholders by a lazy unwrap().
+        :return: nothing
+        """
+
+        stack = [self]
+        while stack:
+            obj = stack.pop()
+            while obj._extras.lazy:
+                obj.__hydrate(next(iter(obj._extras.lazy)))
+            stack.extend(obj.children.values())
+
+    @property
+    def hydrated(self) -> bool:
+        """
+        Whether all children of this object were created, its grandchildren may still be placeholders.
+        """
+
+        return not self._extras.lazy
+
+    def __hydrate(self, child_id: str) -> "MessageObject":
+        wrapped = self._extras.lazy.pop(child_id)
+        child = self.registry.create_object(wrapped[0], self)
+        # not add_child(), as hydrating a child is not a change
+        child._child_id = child_id
+        self.children[child_id] = child
+        state = self._root._extras.cluster
+        if state is not None:
+            if state.path_index is not None:
+                state.path_index.add(self, child_id, child)
+            if state.type_index is not None:
+                state.type_index.add(child)
+        # eager nodes were created by the initial unwrap, so none are left among the placeholders
+        child.__unwrap(wrapped, set())
+        return child
 
-        while not q.empty():
-            parent, child_id, child_type, data, children = q.get()
-            if child_id in parent.children:
-                child = parent.children[child_id]
+    def __eager_nodes(self, wrapped: WrappedObject) -> set[int]:
+        # ids of the wrapped nodes that have to be created right away: nodes of eager types and their ancestors
+        registry = self.registry
+        eager_types = registry.eager_types if registry is not None else None
+        result = set()
+        if not eager_types:
+            return result
+
+        path: list[WrappedObject] = []
+        stack = [iter(wrapped[2].values())]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+
+            if node[0] in eager_types:
+                result.add(id(node))
+                for ancestor in reversed(path):
+                    if id(ancestor) in result:
+                        break
+                    result.add(id(ancestor))
+            if node[2]:
+                path.append(node)
+                stack.append(iter(node[2].values()))
+        return result
+
+    def unwrap_records(self, records: Iterable[WrappedRecord]) -> None:
+        """
+        Unwrap a wrapped object given as a stream of records, creating every object as soon as its record is read.
+        Unlike unwrap(), this does not need the whole wrapped object in memory, which makes it suitable
+        for reading huge snapshots (see wire_format.WireDecoder.iter_records()).
+        The records must come in depth-first order, starting with the record of this object itself.
+        :param records: The records to unwrap, see iter_wrapped().
+        :return: nothing
+        """
+
+        path: list[MessageObject] = []
+        for depth, child_id, child_type, data in records:
+            if depth == 0:
+                child = self
             else:
-                child = parent.registry.create_object(child_type, parent)
-                parent.add_child(child_id, child)
+                del path[depth:]
+                parent = path[-1]
+                child = parent.children.get(child_id)
+                if child is None:
+                    child = parent.registry.create_object(child_type, parent)
+                    parent.add_child(child_id, child)
+                    child.datagram = data
+                    path.append(child)
+                    continue
+
+            # existing objects are overwritten, which is a change, unlike the datagram of new children
             child.datagram = data
-            for child_id, (child_type, data, children) in children.items():
-                q.put((child, child_id, child_type, data, children))
+            child.mark_changed()
+            path.append(child)
+
+    def iter_records(self) -> Iterator[WrappedRecord]:
+        """
+        Wraps the object node by node, without building the nested wrapped tuples.
+        :return: the records of this object and all its children in depth-first order, see unwrap_records().
+        """
 
-    def copy_inplace(self, new_id: str = None) -> "MessageObject":
+        stack = [iter(((None, self),))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            child_id, child = entry
+            depth = len(stack) - 1
+            if isinstance(child, tuple):
+                # a placeholder left by a lazy unwrap
+                for record in iter_wrapped(child):
+                    yield depth + record[0], record[1] if record[0] else child_id, record[2], record[3]
+                continue
+
+            yield depth, child_id, child.object_type, child.datagram
+            if child._extras.lazy:
+                stack.append(itertools.chain(child.children.items(), child._extras.lazy.items()))
+            elif child.children:
+                stack.append(iter(child.children.items()))
+
+    # Change tracking
+    def track_changes(self, enabled: bool = True) -> None:
+        """
+        Enable or disable change tracking for the cluster of this object, see wrap_delta().
+        Added and removed children are tracked automatically, datagram changes have to be reported with mark_changed().
+        Either way, the changes tracked so far are dropped.
+        :param enabled: Whether to track changes.
+        :return: nothing
+        """
+
+        root = self._root
+        root.checkpoint()
+        root.cluster_state.tracking = enabled
+
+    def mark_changed(self) -> None:
+        """
+        Mark the datagram of this object as changed, so that it is included in the next wrap_delta().
+        Does nothing unless change tracking is enabled.
+        :return: nothing
+        """
+
+        state = self._root._extras.cluster
+        if state is not None and state.tracking:
+            self.__change_set().changed = True
+            self.__mark_path()
+
+    def __change_set(self) -> ChangeSet:
+        extras = self.__own_extras()
+        if extras.changes is None:
+            extras.changes = ChangeSet()
+        return extras.changes
+
+    def __mark_path(self) -> None:
+        # every ancestor remembers which of its children lead to a change, so that deltas only visit those
+        obj = self
+        parent = obj._parent
+        while parent is not None:
+            child_id = obj._child_id
+            if parent.children.get(child_id) is not obj:
+                return
+            dirty = parent.__change_set().dirty
+            if child_id in dirty:
+                return
+            dirty.add(child_id)
+            obj, parent = parent, parent._parent
+
+    @property
+    def has_changes(self) -> bool:
+        """
+        Whether this object or any of its children changed since the last checkpoint.
+        """
+
+        changes = self._extras.changes
+        return changes is not None and bool(changes.changed or changes.dirty or changes.added or changes.removed)
+
+    def wrap_delta(self, checkpoint: bool = True) -> Optional[WrappedDelta]:
+        """
+        Wraps the changes of this object and its children since the last checkpoint, see apply_delta().
+        Only the changed parts of the tree are visited.
+        :param checkpoint: Whether to start tracking the changes anew, i.e. whether the delta will be sent.
+        :return: The wrapped delta, or None if nothing changed.
+        """
+
+        if not self.has_changes:
+            return None
+
+        own = self._extras.changes
+        added = {}
+        for child_id in own.added:
+            child = self.children.get(child_id)
+            if child is not None:
+                added[child_id] = child.wrap()
+                if checkpoint:
+                    child.checkpoint()
+            elif self._extras.lazy and child_id in self._extras.lazy:
+                added[child_id] = self._extras.lazy[child_id]
+
+        changes = {}
+        for child_id in own.dirty:
+            child = self.children.get(child_id)
+            # added children are sent whole, including their own changes
+            if child is not None and child_id not in added:
+                delta = child.wrap_delta(checkpoint)
+                if delta is not None:
+                    changes[child_id] = delta
+
+        delta = own.changed, self.datagram if own.changed else None, changes, added, tuple(own.removed)
+        if checkpoint:
+            self._extras.changes = None
+        return delta
+
+    def apply_delta(self, delta: WrappedDelta) -> None:
+        """
+        Apply a delta made by wrap_delta(), reusing the existing children like unwrap() does.
+        :param delta: The wrapped delta.
+        :return: nothing
+        """
+
+        stack = [(self, delta)]
+        while stack:
+            obj, (changed, datagram, changes, added, removed) = stack.pop()
+            for child_id in removed:
+                obj.remove_child(child_id)
+            if changed:
+                obj.datagram = datagram
+                obj.mark_changed()
+            for child_id, wrapped in added.items():
+                child = obj.get(child_id)
+                if child is None:
+                    child = obj.registry.create_object(wrapped[0], obj)
+                    obj.add_child(child_id, child)
+                child.unwrap(wrapped)
+            for child_id, child_delta in changes.items():
+                child = obj.get(child_id)
+                if child is None:
+                    raise KeyError(f"Child {child_id} does not exist, the delta does not match this object")
+                stack.append((child, child_delta))
+
+    def checkpoint(self) -> None:
+        """
+        Forget the changes of this object and its children, e.g. after sending a full wrap().
+        :return: nothing
+        """
+
+        stack = [self]
+        while stack:
+            obj = stack.pop()
+            changes = obj._extras.changes
+            if changes is None:
+                continue
+
+            for child_id in itertools.chain(changes.dirty, changes.added):
+                child = obj.children.get(child_id)
+                if child is not None:
+                    stack.append(child)
+            obj._extras.changes = None
+
+    def copy_inplace(self, new_id: str = None, parent: "MessageObject" = None) -> "MessageObject":
         """
         Copy this object and all children and attach it to the same cluster.
+        Without new_id, the copy is attached by the first add_child() it is passed to.
         Does not copy **kwargs, unless those are saved in a datagram.
+        :param new_id: The id of the copy in the parent.
+        :param parent: The parent of the copy, the parent of this object by default.
         :return: The copied object.
         """
-        wrapped = self.wrap()
-        new = self.__class__(self.parent)
-        new.unwrap(wrapped)
+        if parent is None:
+            parent = self.parent
+        new = self.__class__(parent)
+        self.__clone_into(new)
         if new_id is not None:
-            self.parent.add_child(new_id, new)
+            parent.add_child(new_id, new)
         return new
 
     def copy(self) -> "MessageObject":
@@ -181,36 +975,81 @@ class MessageObject:
         Does not copy **kwargs, unless those are saved in a datagram.
         :return: The copied object.
         """
-        wrapped = self.wrap()
         new = self.__class__()
-        new.unwrap(wrapped)
+        new.registry = self.registry
+        self.__clone_into(new)
         return new
 
+    def __clone_into(self, new: "MessageObject") -> None:
+        # copies the tree directly instead of going through wrap() and unwrap().
+        # Types can define __clone_datagram__(self, clone) to copy their state without building the datagram.
+        stack = [(self, new)]
+        while stack:
+            source, target = stack.pop()
+            clone_datagram = getattr(source, "__clone_datagram__", None)
+            if clone_datagram is not None:
+                clone_datagram(target)
+            else:
+                target.datagram = source.datagram
+            if source._extras.lazy:
+                target.__own_extras().lazy = dict(source._extras.lazy)
+
+            children = target.children
+            for child_id, child in source.children.items():
+                # children created by the __init__ of the target are reused, same as unwrap() does
+                copy = children.get(child_id)
+                if copy is None:
+                    # the copied subtree is new as a whole, so the children are attached without add_child()
+                    copy = child.__class__(target)
+                    copy._child_id = child_id
+                    children[child_id] = copy
+                stack.append((child, copy))
+
     # Top-level registration
     def __get_storage(self, name) -> dict[str, CallbackDict]:
-        parent = self.parent_cluster
-        if parent is self:
-            if getattr(self, name) is None:
-                setattr(self, name, {})
-            return getattr(self, name)
-        return parent.__get_storage(name)
+        return getattr(self.cluster_state, name)
+
+    @classmethod
+    def __compile_chain(cls, target: int | str, handlers: CallbackDict) -> callable:
+        steps = []
+        for obj in handlers.ordered():
+            callback, limit, cargs, ckwargs, pass_obj, priority = handlers[obj]
+            if limit > 0:
+                # limited handlers still have to count down, so they go through the regular path
+                steps.append((functools.partial(cls.__run_limited, target, handlers[obj], obj), None))
+                continue
+
+            if pass_obj:
+                cargs = (obj, *cargs)
+            # only the args are bound, the kwargs are merged on every call as CallbackDefinition does,
+            # so that kwargs of the call that clash with them still raise
+            steps.append((functools.partial(callback, *cargs) if cargs else callback, ckwargs or None))
+
+        steps = tuple(steps)
+
+        def chain(init_value: V, kwargs: dict) -> V:
+            value = init_value
+            for step, ckwargs in steps:
+                if ckwargs is None:
+                    value = step(value, init_value=init_value, **kwargs)
+                else:
+                    value = step(value, **ckwargs, init_value=init_value, **kwargs)
+            return value
+
+        return chain
 
     @staticmethod
-    def __run_method(
-        storage: Optional[CallbackDict], obj: "MessageObject", quad: CallbackDefinition, *args, **kwargs
-    ) -> tuple[any, int]:
-        callback, limit, cargs, ckwargs, pass_obj, priority = quad
-        if pass_obj:
-            value = callback(obj, *cargs, *args, **ckwargs, **kwargs)
-        else:
-            value = callback(*cargs, *args, **ckwargs, **kwargs)
-        if storage:
-            storage[obj] = callback, limit - 1, cargs, ckwargs, pass_obj, priority
-        return value, limit - 1
+    def __run_limited(target: int | str, record: CallbackDefinition, obj: "MessageObject", value: V, **kwargs) -> V:
+        value = record(obj, value, **kwargs)
+        if record.limit > 0:
+            record.limit -= 1
+            if not record.limit:
+                obj.__expire("calculate", target, record)
+        return value
 
     def __setup_listener(
         self,
-        storage: dict[str, CallbackDict],
+        storage_name: str,
         event: int | str,
         callback: callable,
         *args,
@@ -220,28 +1059,76 @@ class MessageObject:
         **kwargs
     ) -> None:
         with self.action_lock as lock:
+            storage = self.__get_storage(storage_name)
             if event not in storage:
-                storage[event] = {}
-            lock.setitem(storage[event], self, (callback, limit, args, kwargs, pass_object, priority))
-
-    def __ignore_listener(self, storage: dict[str, CallbackDict], event: int | str) -> None:
+                storage[event] = CallbackDict()
+            lock.setitem(storage[event], self, CallbackDefinition(callback, limit, args, kwargs, pass_object, priority))
+            if self._subscriptions is None:
+                self._subscriptions = set()
+            self._subscriptions.add((storage_name, event))
+
+    def __register_handlers(self) -> None:
+        # registers all handlers declared on the class within a single lock scope
+        state = self.cluster_state
+        if self._subscriptions is None:
+            self._subscriptions = set()
+        subscriptions = self._subscriptions
+        entries = []
+        with state.action_lock as lock:
+            for storage_name, event, callback, args, kwargs, limit, priority in self.__handlers:
+                storage = getattr(state, storage_name)
+                handlers = storage.get(event)
+                if handlers is None:
+                    handlers = storage[event] = CallbackDict()
+                entries.append((handlers, CallbackDefinition(callback, limit, args, kwargs, True, priority)))
+                subscriptions.add((storage_name, event))
+            # a single deferred change per object, e.g. when created by ObjectRegistry.create_many()
+            lock.run(self.__insert_handlers, entries)
+
+    def __insert_handlers(self, entries: list[tuple[CallbackDict, CallbackDefinition]]) -> None:
+        for handlers, definition in entries:
+            handlers[self] = definition
+
+    def __remove_handlers(self, entries: list[tuple[CallbackDict, CallbackDefinition]]) -> None:
+        for handlers, _ in entries:
+            if self in handlers:
+                del handlers[self]
+
+    def __expire(self, kind: str, name: int | str, record: CallbackDefinition) -> None:
+        # a handler ran out of its limit
+        state = self.cluster_state
+        if state.trace is not None:
+            state.trace.expire(kind, name, record.callback, state.action_lock.levels)
+        self.__ignore_listener(KindStorages[kind], name)
+
+    def __ignore_listener(self, storage_name: str, event: int | str) -> None:
         with self.action_lock as lock:
+            storage = self.__get_storage(storage_name)
             if event not in storage:
                 return
 
             lock.delitem(storage[event], self)
+            if self._subscriptions:
+                self._subscriptions.discard((storage_name, event))
 
     # Bulk Cleanup methods
     def ignore_all(self):
         """
         Ignore all events and math targets.
+        Only the events this object is actually subscribed to are visited.
         :return: nothing
         """
 
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+
+        self._subscriptions = None
         with self.action_lock as lock:
-            for storage in [self.listener_storage, self.math_storage, self.repl_storage]:
-                for event in storage:
-                    lock.delitem(storage[event], self)
+            for storage_name, event in subscriptions:
+                handlers = self.__get_storage(storage_name).get(event)
+                if handlers is not None:
+                    lock.delitem(handlers, self)
 
     def cleanup(self):
         """
@@ -250,9 +1137,104 @@ class MessageObject:
         """
 
         self.ignore_all()
+        state = self._root._extras.cluster
+        if state is not None:
+            if state.path_index is not None:
+                state.path_index.discard(self)
+            if state.type_index is not None:
+                state.type_index.discard(self)
         for child in self.children.values():
             child.cleanup()
         self.children = {}
+        if self._extras.lazy is not None:
+            self._extras.lazy = None
+
+    def detach(self) -> Optional[HandlerRecords]:
+        """
+        Remove the object from its parent and clean it up, keeping the subscription records of the handlers
+        declared on its class, so that reuse() can insert them again. Used by the object pools of ObjectRegistry.
+        :return: the records, or None if any of those handlers was not subscribed anymore.
+        """
+
+        records = None
+        if self.__handlers:
+            records = self.__handler_records()
+        if records is not None:
+            # unsubscribes the class handlers right away, so that cleanup() only visits the other subscriptions
+            state, entries, subscriptions = records
+            with state.action_lock as lock:
+                lock.run(self.__remove_handlers, entries)
+            remaining = self._subscriptions - subscriptions
+            self._subscriptions = remaining or None
+
+        parent = self._parent
+        if parent is not None and parent.children.get(self._child_id) is self:
+            parent.remove_child(self._child_id)
+        else:
+            self.cleanup()
+        # drops the references to the old cluster, except for the records
+        self.parent = None
+        return records
+
+    def __handler_records(self) -> Optional[HandlerRecords]:
+        if not self._subscriptions:
+            # already unsubscribed, e.g. removed during a dispatch, where the removal is still deferred
+            return None
+
+        state = self.cluster_state
+        entries = []
+        subscriptions = set()
+        for storage_name, event, callback, *_ in self.__handlers:
+            handlers = getattr(state, storage_name).get(event)
+            definition = handlers.get(self) if handlers is not None else None
+            if definition is None or definition.callback is not callback:
+                # ran out of its limit, or was replaced by a handler subscribed at runtime
+                return None
+            entries.append((handlers, definition))
+            subscriptions.add((storage_name, event))
+        return state, entries, subscriptions
+
+    def reuse(self, parent: "MessageObject" = None, records: Optional[HandlerRecords] = None, /, **kwargs) -> None:
+        """
+        Prepare an object that was cleaned up to be used again, as if it was created with the given parent.
+        The handlers of its class are subscribed again, then `__reset__(**kwargs)` is called instead of
+        __init__(), followed by the post_init methods. Used by the object pools of ObjectRegistry.
+        :param parent: the new parent of the object.
+        :param records: the records returned by detach(). When the object is reused in the same cluster,
+        they are inserted again with their limits reset, instead of building new ones.
+        :param kwargs: the kwargs the object would have been created with.
+        :return: nothing
+        """
+
+        self.children = {}
+        self._parent = None
+        self._child_id = None
+        self._extras = NoExtras
+        self.parent = parent
+        if records is not None and records[0] is self._root._extras.cluster:
+            self.__restore_handlers(records)
+        elif self.__handlers:
+            self.__register_handlers()
+        self.__reset__(**kwargs)
+        for callback, args, ckwargs in self.__post_inits:
+            callback(self, *args, **ckwargs)
+
+    def __restore_handlers(self, records: HandlerRecords) -> None:
+        state, entries, subscriptions = records
+        for (_, definition), handler in zip(entries, self.__handlers):
+            limit = handler[5]
+            definition.limit = limit if limit > 0 else -1
+        self._subscriptions = subscriptions
+        with state.action_lock as lock:
+            lock.run(self.__insert_handlers, entries)
+
+    def __reset__(self, **kwargs) -> None:
+        """
+        Reset the state of a pooled object before it is reused, see reuse().
+        Does nothing by default, pooled classes override it to restore everything their __init__() sets.
+        :param kwargs: the kwargs the object is requested with.
+        :return: nothing
+        """
 
     # Event storages
     @property
@@ -261,7 +1243,7 @@ class MessageObject:
         Gets the storage used for listener events.
         """
 
-        return self.__get_storage("_ls_storage")
+        return self.__get_storage("listener_storage")
 
     @property
     def math_storage(self) -> dict[str, CallbackDict]:
@@ -269,7 +1251,7 @@ class MessageObject:
         Gets the storage used for mathematical recalculations.
         """
 
-        return self.__get_storage("_mt_storage")
+        return self.__get_storage("math_storage")
 
     @property
     def repl_storage(self) -> dict[str, CallbackDict]:
@@ -277,45 +1259,151 @@ class MessageObject:
         Gets the storage used for method replacements.
         """
 
-        return self.__get_storage("_rm_storage")
+        return self.__get_storage("repl_storage")
 
     # Event listeners
     def listen_to(self, *args, **kwargs) -> None:
         """
         Listen to an event on this object.
         """
-        self.__setup_listener(self.listener_storage, *args, **kwargs)
+        self.__setup_listener("listener_storage", *args, **kwargs)
 
     def register_math(self, *args, **kwargs) -> None:
         """
         Register a mathematical recalculation on this object.
         """
-        self.__setup_listener(self.math_storage, *args, **kwargs)
+        self.__setup_listener("math_storage", *args, **kwargs)
 
     def register_replace(self, *args, **kwargs) -> None:
         """
         Register a method replacement on this object.
         """
-        self.__setup_listener(self.repl_storage, *args, **kwargs)
+        self.__setup_listener("repl_storage", *args, **kwargs)
+
+    def compile_math(self, target: int | str, enabled: bool = True) -> None:
+        """
+        Make calculations of a target use a compiled chain: a single callable with all arguments of the handlers
+        already bound. The chain is rebuilt automatically after handlers are registered, ignored or run out of limit.
+        Useful for targets that are calculated very often, but whose handlers rarely change.
+        :param target: the recalculation target name.
+        :param enabled: whether the target should be compiled.
+        :return: nothing
+        """
+
+        with self.action_lock:
+            storage = self.math_storage
+            if target not in storage:
+                storage[target] = CallbackDict()
+            storage[target].compiled = enabled
+            storage[target].invalidate()
+
+    def enable_math_cache(self, max_size: int = 1024) -> None:
+        """
+        Enable memoization of calculate() results for the whole cluster.
+        Results are dropped automatically when the handlers of the target, or of any target
+        calculated while evaluating it, change. Handlers depending on any other state must call
+        invalidate_math() when it changes. Calculations involving limited handlers are never cached.
+        :param max_size: the number of results to keep, least recently used results are dropped first.
+        :return: nothing
+        """
+
+        self.cluster_state.math_cache = MathCache(max_size)
+
+    def disable_math_cache(self) -> None:
+        """
+        Disable memoization of calculate() results for the whole cluster.
+        :return: nothing
+        """
+
+        self.cluster_state.math_cache = None
+
+    def invalidate_math(self, *targets: int | str) -> None:
+        """
+        Mark the state used by math handlers as changed, dropping the cached results that depend on it.
+        :param targets: the recalculation target names. If none are given, all results are dropped.
+        :return: nothing
+        """
+
+        cache = self.cluster_state.math_cache
+        if cache is not None:
+            cache.invalidate(*targets)
+
+    def enable_profiling(self) -> DispatchProfiler:
+        """
+        Enable profiling of emit(), calculate() and run_replace() for the whole cluster, see DispatchProfiler.
+        While profiling, compiled math chains are not used, so that every handler can be timed.
+        Disabled profiling costs a single check per dispatch.
+        :return: the profiler, which can also export the statistics.
+        """
+
+        state = self.cluster_state
+        if state.profiler is None:
+            state.profiler = DispatchProfiler()
+        return state.profiler
+
+    def disable_profiling(self) -> None:
+        """
+        Disable profiling for the whole cluster, dropping the collected statistics.
+        :return: nothing
+        """
+
+        self.cluster_state.profiler = None
+
+    def stats(self) -> dict[str, dict[int | str, dict]]:
+        """
+        Gets the statistics collected while profiling, see DispatchProfiler.stats().
+        :return: the statistics, or an empty dict if profiling is disabled.
+        """
+
+        profiler = self.cluster_state.profiler
+        return profiler.stats() if profiler is not None else {}
+
+    def enable_trace(self, size: int = 1024, sample_rate: float = 1.0) -> EventTrace:
+        """
+        Enable recording the latest dispatches of the whole cluster in a ring buffer, see EventTrace.
+        :param size: the number of records to keep.
+        :param sample_rate: the fraction of top-level dispatches to record.
+        :return: the trace.
+        """
+
+        trace = self.cluster_state.trace = EventTrace(size, sample_rate)
+        return trace
+
+    def disable_trace(self) -> None:
+        """
+        Disable recording dispatches for the whole cluster, dropping the records.
+        :return: nothing
+        """
+
+        self.cluster_state.trace = None
+
+    def dump_trace(self) -> list[dict]:
+        """
+        Gets the recorded dispatches, oldest first, see EventTrace.dump().
+        :return: the records, or an empty list if tracing is disabled.
+        """
+
+        trace = self.cluster_state.trace
+        return trace.dump() if trace is not None else []
 
     # Event ignores
     def ignore(self, *args, **kwargs) -> None:
         """
         Ignore an event on this object.
         """
-        self.__ignore_listener(self.listener_storage, *args, **kwargs)
+        self.__ignore_listener("listener_storage", *args, **kwargs)
 
     def ignore_math(self, *args, **kwargs) -> None:
         """
         Ignore a mathematical recalculation on this object.
         """
-        self.__ignore_listener(self.math_storage, *args, **kwargs)
+        self.__ignore_listener("math_storage", *args, **kwargs)
 
     def ignore_replacement(self, *args, **kwargs) -> None:
         """
         Ignore a method replacement on this object.
         """
-        self.__ignore_listener(self.repl_storage, *args, **kwargs)
+        self.__ignore_listener("repl_storage", *args, **kwargs)
 
     # Event emitters
     def emit(self, event: int | str, *args, **kwargs) -> None:
@@ -327,15 +1415,105 @@ class MessageObject:
         :return: nothing
         """
 
+        state = self.cluster_state
+        with state.action_lock as lock:
+            if state.trace is not None:
+                state.trace.dispatch("emit", event, lock.levels)
+            handlers = state.listener_storage.get(event)
+            if state.profiler is not None:
+                self.__emit_profiled(state.profiler, handlers, event, args, kwargs)
+            elif handlers:
+                self.__emit_to(handlers, event, args, kwargs)
+
+    def emit_many(self, event: int | str, payloads: Iterable[Sequence], **kwargs) -> None:
+        """
+        Emit an event to the parent cluster once for every payload. The listeners are only resolved and ordered
+        once, and all payloads are dispatched within a single lock scope. The result is the same as emitting
+        the payloads one by one: limits are counted for every payload, and deferred changes to the listeners
+        are applied between the payloads.
+        :param event: The event to emit.
+        :param payloads: The args to pass to the callback, one sequence per emitted event.
+        :param kwargs: The kwargs to pass to the callback for every payload.
+        :return: nothing
+        """
+
+        state = self.cluster_state
+        with state.action_lock as lock:
+            storage = state.listener_storage
+            for args in payloads:
+                if state.trace is not None:
+                    state.trace.dispatch("emit", event, lock.levels)
+                handlers = storage.get(event)
+                if state.profiler is not None:
+                    self.__emit_profiled(state.profiler, handlers, event, args, kwargs)
+                    lock.flush()
+                elif handlers:
+                    self.__emit_to(handlers, event, args, kwargs)
+                    lock.flush()
+
+    @staticmethod
+    def __emit_to(handlers: CallbackDict, event: int | str, args: Sequence, kwargs: dict) -> None:
+        for obj in handlers.ordered(reverse=True):
+            record = handlers[obj]
+            record(obj, *args, **kwargs)
+            if record.limit > 0:
+                # the record is updated in place, unlimited records are left alone
+                record.limit -= 1
+                if not record.limit:
+                    obj.__expire("emit", event, record)
+
+    @staticmethod
+    def __emit_profiled(
+        profiler: DispatchProfiler, handlers: Optional[CallbackDict], event: int | str, args: Sequence, kwargs: dict
+    ) -> None:
+        start = time.perf_counter()
+        for obj in handlers.ordered(reverse=True) if handlers else ():
+            record = handlers[obj]
+            handler_start = time.perf_counter()
+            record(obj, *args, **kwargs)
+            profiler.add_handler("emit", event, record.callback, time.perf_counter() - handler_start)
+            if record.limit > 0:
+                record.limit -= 1
+                if not record.limit:
+                    obj.__expire("emit", event, record)
+        profiler.add_event("emit", event, time.perf_counter() - start)
+
+    async def emit_async(self, event: int | str, *args, **kwargs) -> None:
+        """
+        Emit an event to the parent cluster, awaiting any coroutine listeners.
+        Listeners with the same priority run concurrently, while listeners with a lower priority
+        only start once all listeners with a higher priority are done.
+        Changes to the listeners are deferred until the emission is done, same as with emit().
+        :param event: The event to emit.
+        :param args: The args to pass to the callback.
+        :param kwargs: The kwargs to pass to the callback.
+        :return: nothing
+        """
+
         with self.action_lock:
-            storage = self.listener_storage
-            if event not in storage:
+            handlers = self.listener_storage.get(event)
+            if not handlers:
                 return
 
-            for obj, quad in sorted(storage[event].items(), key=lambda x: x[1][5], reverse=True):
-                new_limit = self.__run_method(storage[event], obj, quad, *args, **kwargs)[1]
-                if new_limit == 0:
-                    obj.ignore(event)
+            pending = []
+            tier = None
+            for obj in handlers.ordered(reverse=True):
+                record = handlers[obj]
+                if pending and record.priority != tier:
+                    await asyncio.gather(*pending)
+                    pending = []
+                tier = record.priority
+
+                value = record(obj, *args, **kwargs)
+                if inspect.isawaitable(value):
+                    pending.append(value)
+                if record.limit > 0:
+                    record.limit -= 1
+                    if not record.limit:
+                        obj.__expire("emit", event, record)
+
+            if pending:
+                await asyncio.gather(*pending)
 
     def calculate(self, target: int | str, init_value: V, **kwargs) -> V:
         """
@@ -346,32 +1524,178 @@ class MessageObject:
         :return: the resultant value
         """
 
+        state = self.cluster_state
+        with state.action_lock as lock:
+            if state.trace is not None:
+                state.trace.dispatch("calculate", target, lock.levels)
+            if state.profiler is not None:
+                return self.__calculate_profiled(state, target, init_value, kwargs)
+            if state.math_cache is not None:
+                return state.math_cache.calculate(state.math_storage, target, init_value, kwargs, self.__calculate)
+            return self.__calculate(state.math_storage, target, init_value, kwargs)
+
+    def __calculate_profiled(self, state: ClusterState, target: int | str, init_value: V, kwargs: dict) -> V:
+        start = time.perf_counter()
+        if state.math_cache is not None:
+            value = state.math_cache.calculate(state.math_storage, target, init_value, kwargs, self.__calculate_timed)
+        else:
+            value = self.__calculate_timed(state.math_storage, target, init_value, kwargs)
+        state.profiler.add_event("calculate", target, time.perf_counter() - start)
+        return value
+
+    def __calculate_timed(self, storage: dict[str, CallbackDict], target: int | str, init_value: V, kwargs: dict) -> V:
+        # same as __calculate(), but times every handler instead of running the compiled chain
+        profiler = self.cluster_state.profiler
+        handlers = storage.get(target)
         current_value = init_value
-        with self.action_lock:
-            storage = self.math_storage
-            if target not in storage:
-                return current_value
+        for obj in handlers.ordered() if handlers else ():
+            record = handlers[obj]
+            handler_start = time.perf_counter()
+            current_value = record(obj, current_value, init_value=init_value, **kwargs)
+            profiler.add_handler("calculate", target, record.callback, time.perf_counter() - handler_start)
+            if record.limit > 0:
+                record.limit -= 1
+                if not record.limit:
+                    obj.__expire("calculate", target, record)
+
+        return current_value
+
+    def __calculate(self, storage: dict[str, CallbackDict], target: int | str, init_value: V, kwargs: dict) -> V:
+        handlers = storage.get(target)
+        if not handlers:
+            return init_value
 
-            for obj, quad in sorted(storage[target].items(), key=lambda x: x[1][5]):
-                current_value, new_limit = self.__run_method(
-                    storage[target], obj, quad, current_value, init_value=init_value, **kwargs
-                )
-                if new_limit == 0:
-                    obj.ignore_math(target)
+        if handlers.compiled:
+            if handlers.chain is None:
+                handlers.chain = self.__compile_chain(target, handlers)
+            return handlers.chain(init_value, kwargs)
+
+        current_value = init_value
+        for obj in handlers.ordered():
+            record = handlers[obj]
+            current_value = record(obj, current_value, init_value=init_value, **kwargs)
+            if record.limit > 0:
+                record.limit -= 1
+                if not record.limit:
+                    obj.__expire("calculate", target, record)
 
         return current_value
 
-    def run_replace(self, name: int | str, *args, **kwargs):
-        methods = self.repl_storage.get(name, {})
+    async def calculate_async(self, target: int | str, init_value: V, **kwargs) -> V:
+        """
+        Emit a calculation request to the parent cluster, awaiting any coroutine handlers.
+        The handlers still run one after another, as every handler needs the result of the previous one.
+        Neither the result cache nor compiled chains are used.
+        :param target: The event to emit.
+        :param init_value: The initial value without any calculation changes.
+        :param kwargs: The kwargs to create the calculation context.
+        :return: the resultant value
+        """
+
+        with self.action_lock:
+            handlers = self.math_storage.get(target)
+            if not handlers:
+                return init_value
+
+            current_value = init_value
+            for obj in handlers.ordered():
+                record = handlers[obj]
+                current_value = record(obj, current_value, init_value=init_value, **kwargs)
+                if inspect.isawaitable(current_value):
+                    current_value = await current_value
+                if record.limit > 0:
+                    record.limit -= 1
+                    if not record.limit:
+                        obj.__expire("calculate", target, record)
+
+            return current_value
+
+    def calculate_batch(self, target: int | str, values, **kwargs):
+        """
+        Calculate a target for a whole NumPy array of initial values in one pass.
+        Handlers marked as array-safe (see `math(array_safe=True)`) receive the whole array at once,
+        other handlers are called for every element separately. Every handler counts the batch as a single use.
+        Requires numpy to be installed.
+        :param target: The event to emit.
+        :param values: The initial values without any calculation changes, anything numpy can convert to an array.
+        :param kwargs: The kwargs to create the calculation context.
+        :return: the array of resultant values
+        """
+
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("calculate_batch requires numpy to be installed") from e
+
+        init_values = np.asarray(values)
+        current_values = init_values
         with self.action_lock:
-            for obj, cb in sorted(methods.items(), key=lambda x: x[1][5], reverse=True):
-                value, limit = self.__run_method(None, obj, cb, *args, **kwargs)
+            handlers = self.math_storage.get(target)
+            if not handlers:
+                return current_values
+
+            for obj in handlers.ordered():
+                record = handlers[obj]
+                if getattr(record.callback, "array_safe", False):
+                    current_values = np.asarray(record(obj, current_values, init_value=init_values, **kwargs))
+                else:
+                    value = [
+                        record(obj, current, init_value=init, **kwargs)
+                        for current, init in zip(current_values.flat, init_values.flat)
+                    ]
+                    current_values = np.array(value).reshape(current_values.shape)
+
+                if record.limit > 0:
+                    record.limit -= 1
+                    if not record.limit:
+                        obj.__expire("calculate", target, record)
+
+        return current_values
+
+    def run_replace(self, name: int | str, *args, **kwargs):
+        state = self.cluster_state
+        with state.action_lock as lock:
+            if state.trace is not None:
+                state.trace.dispatch("run_replace", name, lock.levels)
+            if state.profiler is not None:
+                return self.__run_replace_profiled(state.profiler, name, args, kwargs)
+
+            methods = state.repl_storage.get(name)
+            if not methods:
+                return False, None
+
+            for obj in methods.ordered(reverse=True):
+                record = methods[obj]
+                value = record(obj, *args, **kwargs)
                 if value is FizzleReplace:
                     continue
 
-                methods[obj] = cb[0], limit, cb[2], cb[3], cb[4], cb[5]
-                if limit == 0:
-                    self.ignore_replacement(name)
+                if record.limit > 0:
+                    record.limit -= 1
+                    if not record.limit:
+                        obj.__expire("run_replace", name, record)
                 return True, value
 
         return False, None
+
+    def __run_replace_profiled(self, profiler: DispatchProfiler, name: int | str, args: Sequence, kwargs: dict):
+        start = time.perf_counter()
+        methods = self.repl_storage.get(name)
+        result = False, None
+        for obj in methods.ordered(reverse=True) if methods else ():
+            record = methods[obj]
+            handler_start = time.perf_counter()
+            value = record(obj, *args, **kwargs)
+            profiler.add_handler("run_replace", name, record.callback, time.perf_counter() - handler_start)
+            if value is FizzleReplace:
+                continue
+
+            if record.limit > 0:
+                record.limit -= 1
+                if not record.limit:
+                    obj.__expire("run_replace", name, record)
+            result = True, value
+            break
+
+        profiler.add_event("run_replace", name, time.perf_counter() - start)
+        return result
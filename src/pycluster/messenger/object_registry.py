@@ -1,12 +1,32 @@
 import contextlib
+import io
+import itertools
 import logging
-from typing import Type, TypeVar
+from typing import BinaryIO, Iterable, Optional, Type, TypeVar
 
-from pycluster.messenger.message_object import MessageObject, WrappedObject
+from pycluster.messenger.message_object import HandlerRecords, MessageObject, WrappedObject, WrappedRecord
+from pycluster.messenger.wire_format import DatagramCodec, WireDecoder
 
 T = TypeVar("T", bound=MessageObject)
 
 
+class ObjectPool:
+    """
+    Objects of a single type that were cleaned up and can be reused, see ObjectRegistry.enable_pool().
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: the maximum number of objects kept, released objects beyond it are dropped.
+        """
+
+        self.size = size
+        # the pooled objects with the subscription records they were detached with
+        self.objects: list[tuple[MessageObject, Optional[HandlerRecords]]] = []
+        self.hits = 0
+        self.misses = 0
+
+
 class ObjectRegistry:
     logger = logging.getLogger("pycluster.messenger.ObjectRegistry")
     TemporaryObjectNum = 0
@@ -15,21 +35,83 @@ class ObjectRegistry:
         self.name = name
         self.forgiving = forgiving
         self.objects: dict[int, Type[MessageObject]] = {}
+        # types that are always created when unwrapping lazily, e.g. because they hold listeners
+        self.eager_types: set[int] = set()
+        self.pools: dict[int, ObjectPool] = {}
         if ctype:
             self.bind(0, ctype)
 
-    def bind(self, object_type: int, cls: Type[MessageObject]):
+    def bind(self, object_type: int, cls: Type[MessageObject], eager: bool = False):
         self.objects[object_type] = cls
         cls.object_type = object_type
+        if eager:
+            self.eager_types.add(object_type)
+        else:
+            self.eager_types.discard(object_type)
 
-    def register(self, object_type: int):
+    def register(self, object_type: int, eager: bool = False):
         def decorator(cls: Type[MessageObject]):
-            self.bind(object_type, cls)
+            self.bind(object_type, cls, eager)
             return cls
 
         return decorator
 
+    def enable_pool(self, object_type: int, size: int = 64) -> ObjectPool:
+        """
+        Keep up to `size` released objects of a type for reuse by create_object() and temporary_object().
+        `__reset__(**kwargs)` is called instead of __init__() on reuse, so classes with state of their own
+        have to override it, see MessageObject.reuse().
+        :param object_type: the object type.
+        :param size: the maximum number of objects kept in the pool.
+        :return: the pool, which counts its hits and misses.
+        """
+
+        object_cls = self.objects.get(object_type)
+        if object_cls is None:
+            raise ValueError(f"Object type {object_type} is not registered")
+
+        pool = self.pools.get(object_type)
+        if pool is None:
+            pool = self.pools[object_type] = ObjectPool(size)
+        pool.size = size
+        del pool.objects[size:]
+        return pool
+
+    def disable_pool(self, object_type: int) -> None:
+        """
+        Stop pooling objects of a type, dropping the pooled objects.
+        :param object_type: the object type.
+        :return: nothing
+        """
+
+        self.pools.pop(object_type, None)
+
+    def release(self, obj: MessageObject) -> bool:
+        """
+        Return an object to the pool of its type, so it can be reused. The object is removed from its parent
+        if it was not removed yet, its handlers are kept for reuse only in that case, see MessageObject.detach().
+        The object must not be used afterwards.
+        :param obj: the object.
+        :return: whether the object was kept by a pool, objects that were not are left as they are.
+        """
+
+        pool = self.pools.get(obj.object_type)
+        if pool is None or len(pool.objects) >= pool.size or type(obj) is not self.objects.get(obj.object_type):
+            return False
+
+        pool.objects.append((obj, obj.detach()))
+        return True
+
     def create_object(self, object_type: int, parent: MessageObject, **kwargs) -> MessageObject:
+        pool = self.pools.get(object_type)
+        if pool is not None:
+            if pool.objects:
+                pool.hits += 1
+                obj, records = pool.objects.pop()
+                obj.reuse(parent, records, **kwargs)
+                return obj
+            pool.misses += 1
+
         object_cls = self.objects.get(object_type)
         if object_cls is None:
             if self.forgiving:
@@ -47,11 +129,86 @@ class ObjectRegistry:
         parent.add_child(object_id, obj)
         return obj
 
-    def unwrap(self, wrapped: WrappedObject, parent: MessageObject = None) -> MessageObject:
+    def create_many(
+        self,
+        parent: MessageObject,
+        specs: Iterable[tuple[int, str] | tuple[int, str, dict]],
+        cast_to: Type[T] = MessageObject,
+    ) -> list[T]:
+        """
+        Create a batch of children under the same parent, with the same result as calling create_and_insert()
+        for every spec in order. The lock of a thread-safe cluster is held for the whole batch, so it is acquired
+        only once.
+        No scope is opened for the batch itself, so the handlers of every child are registered as soon as it is
+        created, unless the batch is created during a dispatch, exactly as with create_and_insert().
+        :param parent: the parent of the children.
+        :param specs: the object type and id of every child, optionally followed by the kwargs of the child.
+        :param cast_to: the type of the children, for type hints only.
+        :return: the children, in the order of the specs.
+        """
+
+        created = []
+        create_object = self.create_object
+        add_child = parent.add_child
+        with parent.action_lock.hold():
+            for spec in specs:
+                object_type, object_id, *kwargs = spec
+                obj = create_object(object_type, parent, **kwargs[0]) if kwargs else create_object(object_type, parent)
+                # created with the parent, so the child is always part of the same cluster
+                created.append(add_child(object_id, obj, allow_subtrees=True))
+        return created
+
+    def unwrap(self, wrapped: WrappedObject, parent: MessageObject = None, lazy: bool = False) -> MessageObject:
         object_type, datagram, children_wrapped = wrapped
         obj = self.create_object(object_type, parent)
-        obj._registry = self
-        obj.unwrap(wrapped)
+        obj.registry = self
+        obj.unwrap(wrapped, lazy)
+        return obj
+
+    def unwrap_bytes(
+        self, data: bytes | BinaryIO, parent: MessageObject = None, codec: DatagramCodec = None
+    ) -> MessageObject:
+        """
+        Unwrap an object encoded with the binary wire format (see wire_format.encode()), creating
+        the objects while the data is being read, without building the wrapped tuples first.
+        Unlike unwrap(), the children are created in depth-first order.
+        :param data: the encoded bytes, or a binary stream to read them from.
+        :param parent: the parent of the unwrapped object.
+        :param codec: the codec used for datagrams, pickle by default.
+        :return: the unwrapped object.
+        """
+
+        return self.unwrap_stream(data, parent, codec)
+
+    def unwrap_stream(
+        self,
+        source: bytes | BinaryIO | Iterable[WrappedRecord],
+        parent: MessageObject = None,
+        codec: DatagramCodec = None,
+    ) -> MessageObject:
+        """
+        Unwrap an object from a stream of records (see MessageObject.unwrap_records()), creating every object
+        as soon as its record is read, so that the whole wrapped object never has to be kept in memory.
+        :param source: the records in depth-first order, or the bytes or binary stream of the wire format
+        to read them from.
+        :param parent: the parent of the unwrapped object.
+        :param codec: the codec used for datagrams when reading the wire format, pickle by default.
+        :return: the unwrapped object.
+        """
+
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        if hasattr(source, "read"):
+            source = WireDecoder(source, codec).iter_records()
+
+        records = iter(source)
+        first = next(records, None)
+        if first is None or first[0] != 0:
+            raise ValueError("The stream does not start with a root record")
+
+        obj = self.create_object(first[2], parent)
+        obj.registry = self
+        obj.unwrap_records(itertools.chain((first,), records))
         return obj
 
     @contextlib.contextmanager
@@ -61,8 +218,10 @@ class ObjectRegistry:
         self.TemporaryObjectNum += 1
         object_id = f"_tempObject_{self.TemporaryObjectNum}"
 
+        obj = None
         try:
             obj = self.create_and_insert(object_type, parent, object_id, cast_to, **kwargs)
             yield obj
         finally:
-            parent.remove_child(object_id)
+            if obj is None or not self.release(obj):
+                parent.remove_child(object_id)
@@ -0,0 +1,136 @@
+import json
+import os
+from typing import Optional
+
+# the kinds of dispatches that are profiled
+DispatchKinds = ("emit", "calculate", "run_replace")
+
+
+class DispatchStats:
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self) -> dict[str, float]:
+        return {"calls": self.calls, "total": self.total, "max": self.max}
+
+
+class DispatchProfiler:
+    """
+    DispatchProfiler counts the calls of emit(), calculate() and run_replace() within a cluster, and measures
+    their cumulative and maximum time, both per event or target name and per handler. Handlers are identified
+    by the qualified name of their callback, so the handlers of all objects of a class are counted together.
+    Times include nested dispatches, e.g. events emitted by a listener.
+    """
+
+    def __init__(self):
+        self.events: dict[tuple[str, int | str], DispatchStats] = {}
+        self.handlers: dict[tuple[str, int | str, str], DispatchStats] = {}
+
+    def add_event(self, kind: str, name: int | str, elapsed: float) -> None:
+        """
+        Records a single dispatch.
+        :param kind: the kind of the dispatch, one of `DispatchKinds`.
+        :param name: the event or target name.
+        :param elapsed: the time of the dispatch in seconds.
+        :return: nothing
+        """
+
+        stats = self.events.get((kind, name))
+        if stats is None:
+            stats = self.events[kind, name] = DispatchStats()
+        stats.add(elapsed)
+
+    def add_handler(self, kind: str, name: int | str, callback: callable, elapsed: float) -> None:
+        """
+        Records a single call of a handler.
+        :param kind: the kind of the dispatch, one of `DispatchKinds`.
+        :param name: the event or target name.
+        :param callback: the callback of the handler.
+        :param elapsed: the time of the call in seconds.
+        :return: nothing
+        """
+
+        key = kind, name, getattr(callback, "__qualname__", None) or repr(callback)
+        stats = self.handlers.get(key)
+        if stats is None:
+            stats = self.handlers[key] = DispatchStats()
+        stats.add(elapsed)
+
+    def reset(self) -> None:
+        """
+        Drops all collected statistics.
+        :return: nothing
+        """
+
+        self.events = {}
+        self.handlers = {}
+
+    def stats(self) -> dict[str, dict[int | str, dict]]:
+        """
+        Gets the collected statistics.
+        :return: the calls, total and max time (in seconds) of every event or target name by the kind of dispatch,
+        with the same statistics of every handler under "handlers".
+        """
+
+        result = {kind: {} for kind in DispatchKinds}
+        for (kind, name), stats in self.events.items():
+            result[kind][name] = {**stats.to_dict(), "handlers": {}}
+        for (kind, name, handler), stats in self.handlers.items():
+            entry = result[kind].get(name)
+            if entry is None:
+                entry = result[kind][name] = {**DispatchStats().to_dict(), "handlers": {}}
+            entry["handlers"][handler] = stats.to_dict()
+        return result
+
+    def export_json(self, file: str | os.PathLike) -> None:
+        """
+        Writes the collected statistics to a JSON file, see stats().
+        :param file: the path of the file.
+        :return: nothing
+        """
+
+        stats = {kind: {str(name): entry for name, entry in names.items()} for kind, names in self.stats().items()}
+        with open(file, "w") as stream:
+            json.dump(stats, stream, indent=2)
+
+    def export_prometheus(self, file: str | os.PathLike, prefix: str = "pycluster") -> None:
+        """
+        Writes the collected statistics to a file in the Prometheus text format, e.g. for the textfile collector.
+        :param file: the path of the file.
+        :param prefix: the prefix of the metric names.
+        :return: nothing
+        """
+
+        lines = []
+        for metric, source, label_names in (
+            ("dispatch", self.events, ("kind", "name")),
+            ("handler", self.handlers, ("kind", "name", "handler")),
+        ):
+            for suffix, kind, description, field in (
+                ("calls_total", "counter", "Number of calls", "calls"),
+                ("seconds_total", "counter", "Cumulative time of the calls in seconds", "total"),
+                ("seconds_max", "gauge", "Longest call in seconds", "max"),
+            ):
+                name = f"{prefix}_{metric}_{suffix}"
+                lines.append(f"# HELP {name} {description} per {metric}.")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, stats in source.items():
+                    labels = ",".join(f'{label}="{self.__escape(value)}"' for label, value in zip(label_names, key))
+                    lines.append(f"{name}{{{labels}}} {getattr(stats, field)}")
+
+        with open(file, "w") as stream:
+            stream.write("\n".join(lines) + "\n")
+
+    @staticmethod
+    def __escape(value: Optional[int | str]) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,222 @@
+"""
+An on-disk snapshot of a wrapped object, which allows single subtrees to be read without parsing the rest of the file.
+
+The file starts with the `MAGIC` header, followed by the nodes in the binary wire format (see wire_format).
+All child ids are stored in a table, so that no ids are interned inside the nodes and every subtree
+is a self-contained slice of the file. The id table follows the nodes: the UTF-8 bytes of all ids,
+then the position of every id and the end of the last one as 8-byte little-endian integers,
+so that single ids can be read without parsing the table.
+An index of the subtrees up to a given depth, keyed by their path of child ids, is stored as JSON after the table,
+together with the position and size of the table.
+The file ends with the position of the JSON as an 8-byte little-endian integer and the `MAGIC` header again.
+"""
+
+import io
+import json
+import mmap
+import os
+import struct
+from typing import Sequence
+
+from pycluster.messenger.message_object import MessageObject, WrappedObject, iter_wrapped
+from pycluster.messenger.object_registry import ObjectRegistry
+from pycluster.messenger.wire_format import DatagramCodec, WireDecoder, WireEncoder
+
+MAGIC = b"PYCS\x02"
+Footer = struct.Struct("<Q")
+Offset = struct.Struct("<Q")
+
+SnapshotPath = tuple[str, ...]
+
+
+def write_snapshot(
+    file: str | os.PathLike, wrapped: WrappedObject, codec: DatagramCodec = None, index_depth: int = 2
+) -> None:
+    """
+    Write a wrapped object to a snapshot file.
+    :param file: the path of the file.
+    :param wrapped: the wrapped object.
+    :param codec: the codec used for datagrams, pickle by default.
+    :param index_depth: the depth up to which subtrees are indexed, deeper subtrees are found by reading their ancestor.
+    :return: nothing
+    """
+
+    ids = list(dict.fromkeys(record[1] for record in iter_wrapped(wrapped) if record[0]))
+    index: dict[SnapshotPath, tuple[int, int]] = {}
+    with open(file, "wb") as stream:
+        encoder = WireEncoder(stream, codec, ids)
+        encoder.buffer += MAGIC
+
+        # subtrees that were started, but not finished yet, with their path and position
+        path: list[str] = []
+        opened: list[tuple[SnapshotPath, int]] = []
+        stack = [iter(((None, wrapped),))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                continue
+
+            depth = len(stack) - 1
+            while opened and len(opened[-1][0]) >= depth:
+                end = encoder.tell()
+                subtree, start = opened.pop()
+                index[subtree] = start, end - start
+
+            child_id, (object_type, datagram, children) = entry
+            position = encoder.write_record(child_id, object_type, datagram, len(children))
+            if depth <= index_depth:
+                opened.append(((*path, child_id) if depth else (), position))
+            if children:
+                if depth:
+                    path.append(child_id)
+                stack.append(iter(children.items()))
+
+        end = encoder.tell()
+        for subtree, start in opened:
+            index[subtree] = start, end - start
+        encoder.flush()
+
+        offsets = [stream.tell()]
+        for child_id in ids:
+            stream.write(child_id.encode())
+            offsets.append(stream.tell())
+        stream.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+
+        metadata = {
+            "ids": [offsets[-1], len(ids)],
+            "index_depth": index_depth,
+            "index": [[*subtree, start, length] for subtree, (start, length) in index.items()],
+        }
+        position = stream.tell()
+        stream.write(json.dumps(metadata).encode())
+        stream.write(Footer.pack(position))
+        stream.write(MAGIC)
+
+
+class SnapshotIds(Sequence[str]):
+    """
+    The id table of a snapshot, which reads ids from the file when they are first used.
+    """
+
+    def __init__(self, data: mmap.mmap, position: int, count: int):
+        """
+        :param data: the mapped file.
+        :param position: the position of the offsets of the ids.
+        :param count: the number of ids.
+        """
+
+        self.data = data
+        self.position = position
+        self.count = count
+        self.cache: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        child_id = self.cache.get(index)
+        if child_id is None:
+            if not 0 <= index < self.count:
+                raise IndexError(f"Id {index} is not in the snapshot")
+            (start,) = Offset.unpack_from(self.data, self.position + index * Offset.size)
+            (end,) = Offset.unpack_from(self.data, self.position + (index + 1) * Offset.size)
+            child_id = self.cache[index] = self.data[start:end].decode()
+        return child_id
+
+
+class Snapshot:
+    """
+    A snapshot file opened for reading. The file is memory-mapped, so only the parts that are read are loaded.
+    """
+
+    def __init__(self, file: str | os.PathLike, registry: ObjectRegistry = None, codec: DatagramCodec = None):
+        """
+        :param file: the path of the file.
+        :param registry: the registry used by unwrap().
+        :param codec: the codec used for datagrams, pickle by default.
+        """
+
+        self.registry = registry
+        self.codec = codec
+        with open(file, "rb") as stream:
+            self.mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        footer = len(self.mmap) - Footer.size - len(MAGIC)
+        if footer < len(MAGIC) or self.mmap[: len(MAGIC)] != MAGIC or self.mmap[-len(MAGIC) :] != MAGIC:
+            self.close()
+            raise ValueError(f"{file} is not a snapshot")
+
+        (position,) = Footer.unpack(self.mmap[footer : footer + Footer.size])
+        metadata = json.loads(self.mmap[position:footer])
+        self.ids = SnapshotIds(self.mmap, *metadata["ids"])
+        self.index_depth: int = metadata["index_depth"]
+        self.index: dict[SnapshotPath, tuple[int, int]] = {
+            tuple(entry[:-2]): (entry[-2], entry[-1]) for entry in metadata["index"]
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, path: Sequence[str]) -> bool:
+        path = tuple(str(child_id) for child_id in path)
+        if len(path) <= self.index_depth:
+            return path in self.index
+        try:
+            self.read(path)
+        except KeyError:
+            return False
+        return True
+
+    def read(self, path: Sequence[str] = ()) -> WrappedObject:
+        """
+        Read a subtree of the snapshot.
+        Subtrees deeper than the index depth are found by reading their deepest indexed ancestor.
+        :param path: the child ids leading to the subtree, the root by default.
+        :return: the wrapped subtree.
+        """
+
+        path = tuple(str(child_id) for child_id in path)
+        for depth in range(min(len(path), self.index_depth), -1, -1):
+            entry = self.index.get(path[:depth])
+            if entry is not None:
+                break
+        else:
+            raise KeyError(f"Subtree {'/'.join(path)} is not in the snapshot")
+
+        if depth < len(path) and depth < self.index_depth:
+            # the ancestor is indexed, but the child is not, so it does not exist
+            raise KeyError(f"Subtree {'/'.join(path)} is not in the snapshot")
+
+        start, length = entry
+        wrapped = WireDecoder(io.BytesIO(self.mmap[start : start + length]), self.codec, self.ids).read(header=False)
+        for child_id in path[depth:]:
+            try:
+                wrapped = wrapped[2][child_id]
+            except KeyError:
+                raise KeyError(f"Subtree {'/'.join(path)} is not in the snapshot") from None
+        return wrapped
+
+    def unwrap(self, path: Sequence[str] = (), parent: MessageObject = None, lazy: bool = False) -> MessageObject:
+        """
+        Read a subtree of the snapshot and unwrap it using the registry of the snapshot.
+        :param path: the child ids leading to the subtree, the root by default.
+        :param parent: the parent of the unwrapped object.
+        :param lazy: whether to unwrap lazily, see MessageObject.unwrap().
+        :return: the unwrapped object.
+        """
+
+        return self.registry.unwrap(self.read(path), parent, lazy)
+
+    def close(self) -> None:
+        """
+        Close the file.
+        :return: nothing
+        """
+
+        self.mmap.close()
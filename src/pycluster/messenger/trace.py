@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Optional
+
+# a single record of the trace: its sequence number, wall clock time, kind, event or target name,
+# the number of open lock scopes (1 for a top-level dispatch) and the expired handler, if any
+TraceEntry = tuple[int, float, str, int | str, int, Optional[str]]
+
+
+class EventTrace:
+    """
+    EventTrace keeps the latest dispatches of a cluster in a fixed-size ring buffer: every emit(), calculate()
+    and run_replace(), and every handler that ran out of its limit ("expire" records), in the order they happened.
+    Sampling is decided for every top-level dispatch, and the dispatches nested in it follow that decision,
+    so a sampled cascade is always recorded as a whole.
+    """
+
+    def __init__(self, size: int = 1024, sample_rate: float = 1.0):
+        """
+        :param size: the number of records to keep, older records are dropped first.
+        :param sample_rate: the fraction of top-level dispatches to record, from 0 to 1.
+        Sampling is deterministic: with a rate of 0.25, every fourth top-level dispatch is recorded.
+        """
+
+        self.entries: deque[TraceEntry] = deque(maxlen=size)
+        self.sample_rate = sample_rate
+        self.sampled = True
+        self.sequence = 0
+        self.credit = 0.0
+
+    def dispatch(self, kind: str, name: int | str, levels: int) -> None:
+        """
+        Records a dispatch, if it is sampled.
+        :param kind: "emit", "calculate" or "run_replace".
+        :param name: the event or target name.
+        :param levels: the number of open lock scopes, see ActionLock.levels.
+        :return: nothing
+        """
+
+        if levels <= 1:
+            self.credit += self.sample_rate
+            self.sampled = self.credit >= 1
+            if self.sampled:
+                self.credit -= 1
+
+        if self.sampled:
+            self.sequence += 1
+            self.entries.append((self.sequence, time.time(), kind, name, levels, None))
+
+    def expire(self, kind: str, name: int | str, callback: callable, levels: int) -> None:
+        """
+        Records a handler that ran out of its limit, if the dispatch it happened in is sampled.
+        :param kind: the kind of the dispatch.
+        :param name: the event or target name.
+        :param callback: the callback of the handler.
+        :param levels: the number of open lock scopes, see ActionLock.levels.
+        :return: nothing
+        """
+
+        if self.sampled:
+            self.sequence += 1
+            handler = getattr(callback, "__qualname__", None) or repr(callback)
+            self.entries.append((self.sequence, time.time(), "expire", name, levels, f"{kind}:{handler}"))
+
+    def clear(self) -> None:
+        """
+        Drops all records.
+        :return: nothing
+        """
+
+        self.entries.clear()
+
+    def dump(self) -> list[dict]:
+        """
+        Gets the records, oldest first.
+        :return: the records as dicts.
+        """
+
+        return [
+            {"sequence": sequence, "time": timestamp, "kind": kind, "name": name, "levels": levels, "handler": handler}
+            for sequence, timestamp, kind, name, levels, handler in self.entries
+        ]
+
+    def export_json(self, file: str | os.PathLike) -> None:
+        """
+        Writes the records to a JSON file, see dump().
+        :param file: the path of the file.
+        :return: nothing
+        """
+
+        with open(file, "w") as stream:
+            json.dump(self.dump(), stream, indent=2, default=str)
@@ -0,0 +1,299 @@
+"""
+A compact binary format for wrapped objects, see MessageObject.wrap().
+
+The stream starts with the `MAGIC` header, followed by the root node. Every node is written as:
+* the object type as a zigzag-encoded varint;
+* the datagram: a varint of 0 for None, or the length of the encoded datagram plus one followed by its bytes;
+* the number of children as a varint, followed by the id and the node of every child.
+Child ids are interned: a varint of 0 is followed by a new id (its length as a varint, then UTF-8 bytes),
+which is added to the table of known ids, while a varint N > 0 refers to the (N-1)-th known id.
+Nodes are written in depth-first order, so a subtree is always a contiguous slice of the stream.
+"""
+
+import io
+import pickle
+from typing import BinaryIO, Iterator, Optional, Protocol, Sequence
+
+from pycluster.messenger.message_object import WrappedChildren, WrappedObject, WrappedRecord
+
+MAGIC = b"PYCL\x01"
+ChunkSize = 1 << 16
+
+
+class DatagramCodec(Protocol):
+    def encode(self, datagram) -> bytes:
+        ...
+
+    def decode(self, data: bytes):
+        ...
+
+
+class PickleCodec:
+    """
+    The default datagram codec, which can encode anything picklable.
+    """
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL):
+        self.protocol = protocol
+
+    def encode(self, datagram) -> bytes:
+        return pickle.dumps(datagram, self.protocol)
+
+    def decode(self, data: bytes):
+        return pickle.loads(data)
+
+
+class WireEncoder:
+    """
+    Writes wrapped objects to a binary stream.
+    """
+
+    def __init__(self, stream: BinaryIO, codec: DatagramCodec = None, ids: Sequence[str] = ()):
+        """
+        :param stream: the stream to write to.
+        :param codec: the codec used for datagrams, pickle by default.
+        :param ids: child ids that the decoder will already know, these are not written to the stream.
+        """
+
+        self.stream = stream
+        self.codec = codec or PickleCodec()
+        self.ids: dict[str, int] = {child_id: i + 1 for i, child_id in enumerate(ids)}
+        self.buffer = bytearray()
+        self.written = 0
+
+    def write(self, wrapped: WrappedObject, header: bool = True) -> None:
+        """
+        Writes a wrapped object to the stream.
+        :param wrapped: the wrapped object.
+        :param header: whether to start with the format header.
+        :return: nothing
+        """
+
+        if header:
+            self.buffer += MAGIC
+        self.write_node(wrapped)
+        self.flush()
+
+    def write_node(self, wrapped: WrappedObject) -> None:
+        """
+        Writes a single node with its children, without the header, and without flushing the stream.
+        :param wrapped: the wrapped object.
+        :return: nothing
+        """
+
+        stack = [iter(((None, wrapped),))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            child_id, (object_type, datagram, children) = entry
+            self.write_record(child_id, object_type, datagram, len(children))
+            if children:
+                stack.append(iter(children.items()))
+
+    def flush(self) -> None:
+        """
+        Writes the buffered bytes to the stream.
+        :return: nothing
+        """
+
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = bytearray()
+
+    def tell(self) -> int:
+        """
+        Gets the position of the next node in the stream, counting the buffered bytes.
+        Only works for streams that support tell().
+        :return: the position.
+        """
+
+        return self.stream.tell() + len(self.buffer)
+
+    def write_record(self, child_id: Optional[str], object_type: int, datagram, count: int) -> int:
+        """
+        Writes a single node, which has to be followed by the given number of children.
+        :param child_id: the id of the node in its parent, None for the root.
+        :param object_type: the type of the node.
+        :param datagram: the datagram of the node.
+        :param count: the number of children of the node.
+        :return: the position of the node after its id, counted from where this encoder started writing.
+        The subtree of the node can be read starting from there.
+        """
+
+        if child_id is not None:
+            self.__write_id(child_id)
+        position = self.written + len(self.buffer)
+        self.__write_varint(object_type * 2 if object_type >= 0 else -object_type * 2 - 1)
+        if datagram is None:
+            self.buffer.append(0)
+        else:
+            data = self.codec.encode(datagram)
+            self.__write_varint(len(data) + 1)
+            self.buffer += data
+        self.__write_varint(count)
+        if len(self.buffer) >= ChunkSize:
+            self.flush()
+        return position
+
+    def __write_id(self, child_id: str) -> None:
+        index = self.ids.get(child_id)
+        if index is not None:
+            self.__write_varint(index)
+            return
+
+        self.ids[child_id] = len(self.ids) + 1
+        data = child_id.encode()
+        self.buffer.append(0)
+        self.__write_varint(len(data))
+        self.buffer += data
+
+    def __write_varint(self, value: int) -> None:
+        buffer = self.buffer
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+
+class WireDecoder:
+    """
+    Reads wrapped objects from a binary stream.
+    """
+
+    def __init__(self, stream: BinaryIO, codec: DatagramCodec = None, ids: Sequence[str] = ()):
+        """
+        :param stream: the stream to read from.
+        :param codec: the codec used for datagrams, pickle by default.
+        :param ids: child ids that the encoder already knew, see WireEncoder.
+        The sequence is shared, not copied, ids that are new to the stream are kept separately.
+        """
+
+        self.stream = stream
+        self.codec = codec or PickleCodec()
+        self.known_ids = ids
+        self.ids: list[str] = []
+        self.data = b""
+        self.pos = 0
+
+    def read(self, header: bool = True) -> WrappedObject:
+        """
+        Reads a wrapped object from the stream.
+        :param header: whether the stream starts with the format header.
+        :return: the wrapped object.
+        """
+
+        stack: list[WrappedChildren] = []
+        root = None
+        for depth, child_id, object_type, datagram in self.iter_records(header):
+            wrapped = object_type, datagram, {}
+            if depth == 0:
+                root = wrapped
+            else:
+                del stack[depth:]
+                stack[-1][child_id] = wrapped
+            stack.append(wrapped[2])
+        return root
+
+    def iter_records(self, header: bool = True) -> Iterator[WrappedRecord]:
+        """
+        Reads a wrapped object from the stream node by node, without building the wrapped tuples.
+        The nodes are yielded in depth-first order, every node after its parent.
+        :param header: whether the stream starts with the format header.
+        :return: the iterator of records.
+        """
+
+        if header and self.__read(len(MAGIC)) != MAGIC:
+            raise ValueError("The stream does not contain a wrapped object")
+
+        object_type, datagram, count = self.__read_node()
+        yield 0, None, object_type, datagram
+        remaining = [count]
+        while remaining:
+            if not remaining[-1]:
+                remaining.pop()
+                continue
+
+            remaining[-1] -= 1
+            child_id = self.__read_id()
+            object_type, datagram, count = self.__read_node()
+            yield len(remaining), child_id, object_type, datagram
+            remaining.append(count)
+
+    def __read_node(self) -> tuple[int, any, int]:
+        object_type = self.__read_varint()
+        object_type = object_type >> 1 if not object_type & 1 else -(object_type >> 1) - 1
+        length = self.__read_varint()
+        datagram = self.codec.decode(self.__read(length - 1)) if length else None
+        return object_type, datagram, self.__read_varint()
+
+    def __read_id(self) -> str:
+        index = self.__read_varint()
+        if index:
+            known = len(self.known_ids)
+            return self.known_ids[index - 1] if index <= known else self.ids[index - known - 1]
+
+        child_id = self.__read(self.__read_varint()).decode()
+        self.ids.append(child_id)
+        return child_id
+
+    def __read_varint(self) -> int:
+        if self.pos >= len(self.data):
+            self.__fill(1)
+        byte = self.data[self.pos]
+        self.pos += 1
+        if byte < 0x80:
+            return byte
+
+        value = byte & 0x7F
+        shift = 7
+        while True:
+            if self.pos >= len(self.data):
+                self.__fill(1)
+            byte = self.data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def __read(self, length: int) -> bytes:
+        if self.pos + length > len(self.data):
+            self.__fill(length)
+        data = self.data[self.pos : self.pos + length]
+        self.pos += length
+        return data
+
+    def __fill(self, length: int) -> None:
+        chunk = self.stream.read(max(length, ChunkSize))
+        self.data = self.data[self.pos :] + chunk
+        self.pos = 0
+        if len(self.data) < length:
+            raise EOFError("Unexpected end of the stream")
+
+
+def encode(wrapped: WrappedObject, codec: DatagramCodec = None) -> bytes:
+    """
+    Encodes a wrapped object into bytes.
+    :param wrapped: the wrapped object.
+    :param codec: the codec used for datagrams, pickle by default.
+    :return: the encoded bytes.
+    """
+
+    stream = io.BytesIO()
+    WireEncoder(stream, codec).write(wrapped)
+    return stream.getvalue()
+
+
+def decode(data: bytes, codec: DatagramCodec = None) -> WrappedObject:
+    """
+    Decodes a wrapped object from bytes.
+    :param data: the encoded bytes.
+    :param codec: the codec used for datagrams, pickle by default.
+    :return: the wrapped object.
+    """
+
+    return WireDecoder(io.BytesIO(data), codec).read()
@@ -1,4 +1,6 @@
-from typing import TypeVar
+import contextlib
+import threading
+from typing import ContextManager, TypeVar
 
 K = TypeVar("K")
 T = TypeVar("T")
@@ -28,6 +30,25 @@ class ActionLock:
                 callback(*args, **kwargs)
             self.callbacks = []
 
+    def flush(self):
+        """
+        Runs the deferred callbacks right away, as if the outermost scope was exited and entered again.
+        Does nothing in nested scopes, where the callbacks have to wait for the outermost scope anyway.
+        """
+
+        if self.levels == 1:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback, args, kwargs in callbacks:
+                callback(*args, **kwargs)
+
+    def hold(self) -> ContextManager:
+        """
+        Keeps other threads away from the resources without opening a scope, so changes made within it
+        are not deferred unless a scope is already open. Does nothing, as this lock is not shared between threads.
+        """
+
+        return contextlib.nullcontext()
+
     def run(self, callback, *args, **kwargs):
         if self.levels == 1:
             callback(*args, **kwargs)
@@ -46,3 +67,39 @@ class ActionLock:
                 del dct[key]
 
         self.run(callback)
+
+
+class ThreadSafeActionLock(ActionLock):
+    """
+    ThreadSafeActionLock is an ActionLock that can be shared between threads.
+    The outermost scope is guarded by a reentrant lock, so only one thread at a time can iterate
+    over the resources or change them, while nested scopes in the same thread work as usual.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()
+        # bound once, as they are called on every scope
+        self.acquire = self.lock.acquire
+        self.release = self.lock.release
+
+    def hold(self) -> ContextManager:
+        return self.lock
+
+    def __enter__(self):
+        self.acquire()
+        self.levels += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.levels -= 1
+        if self.levels or not self.callbacks:
+            self.release()
+            return
+
+        try:
+            for callback, args, kwargs in self.callbacks:
+                callback(*args, **kwargs)
+            self.callbacks = []
+        finally:
+            self.release()
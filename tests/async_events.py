@@ -0,0 +1,85 @@
+import asyncio
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("async_events", MessageCluster)
+
+
+@registry.register(1)
+class SaveObject(MessageObject):
+    def __init__(self, parent, log: list, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.log = log
+        self.saved = asyncio.Event()
+        self.other: "SaveObject" = None
+
+    @listen("save", priority=1)
+    async def save(self):
+        self.log.append("start")
+        self.saved.set()
+        # only finishes if the other listener of the same priority runs concurrently
+        await asyncio.wait_for(self.other.saved.wait(), timeout=1)
+        self.log.append("end")
+        self.listen_to("after_save", self.after_save)
+        # the emission still holds the lock, so the new listener is only attached once it is done
+        assert self not in self.listener_storage["after_save"]
+
+    def after_save(self):
+        self.log.append("after_save")
+
+    @math("load", limit=1)
+    async def load(self, value, **kwargs):
+        await asyncio.sleep(0)
+        return value + 1
+
+
+@registry.register(2)
+class NotifyObject(MessageObject):
+    def __init__(self, parent, log: list, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.log = log
+
+    @listen("save")
+    def notify(self):
+        self.log.append("notify")
+
+    @math("load", priority=1)
+    def double(self, value, **kwargs):
+        return value * 2
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    log = []
+    first = registry.create_and_insert(1, cluster, "first", cast_to=SaveObject, log=log)
+    second = registry.create_and_insert(1, cluster, "second", cast_to=SaveObject, log=log)
+    first.other, second.other = second, first
+    registry.create_and_insert(2, cluster, "notify", log=log)
+    return cluster, first, second, log
+
+
+async def run_async_events():
+    tree, first, second, log = construct_tree()
+    await tree.emit_async("save")
+    # listeners with a lower priority wait for the higher priority tier
+    assert log == ["start", "start", "end", "end", "notify"]
+    assert not tree.action_lock.callbacks
+
+    log.clear()
+    await tree.emit_async("after_save")
+    assert log == ["after_save", "after_save"]
+
+    assert await tree.calculate_async("load", 1) == 6
+    assert await tree.calculate_async("load", 1) == 2
+    assert await tree.calculate_async("missing", 1) == 1
+
+
+def test_async_events():
+    asyncio.run(run_async_events())
+
+
+if __name__ == "__main__":
+    test_async_events()
@@ -0,0 +1,63 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+registry = ObjectRegistry("batch_calculations", MessageCluster)
+
+
+@registry.register(1)
+class VectorObject(MessageObject):
+    @math("damage", array_safe=True)
+    def scale(self, value, **kwargs):
+        return value * 2
+
+
+@registry.register(2)
+class ScalarObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.calls = 0
+
+    @math("damage", priority=1)
+    def clamp(self, value, init_value, cap=100, **kwargs):
+        assert not isinstance(value, np.ndarray)
+        self.calls += 1
+        return min(value, cap) + init_value
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    registry.create_and_insert(1, cluster, "vector")
+    scalar = registry.create_and_insert(2, cluster, "scalar", cast_to=ScalarObject)
+    return cluster, scalar
+
+
+def test_batch_calculations():
+    tree, scalar = construct_tree()
+    values = np.array([1, 10, 60])
+    result = tree.calculate_batch("damage", values, cap=50)
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == [tree.calculate("damage", value, cap=50) for value in values.tolist()]
+    assert result.tolist() == [3, 30, 110]
+    assert scalar.calls == 6
+
+    assert tree.calculate_batch("missing", [1, 2]).tolist() == [1, 2]
+    assert tree.calculate_batch("damage", np.array([[1, 2], [3, 4]])).tolist() == [[3, 6], [9, 12]]
+
+    # a batch counts as a single use of a limited handler
+    tree.register_math("damage", lambda value, **kwargs: value - 1, limit=1, priority=2)
+    assert tree.calculate_batch("damage", [1, 2]).tolist() == [2, 5]
+    assert tree.calculate_batch("damage", [1, 2]).tolist() == [3, 6]
+
+
+if __name__ == "__main__":
+    if np is None:
+        print("numpy is not installed, skipping")
+    else:
+        test_batch_calculations()
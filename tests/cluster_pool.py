@@ -0,0 +1,107 @@
+import os
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.cluster_pool import ClusterPool
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("cluster_pool", MessageCluster)
+
+
+@registry.register(1)
+class ScoreObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.score = 0
+
+    @property
+    def datagram(self):
+        return self.score
+
+    @datagram.setter
+    def datagram(self, value):
+        self.score = value
+
+    @listen("score")
+    def add_score(self, points):
+        self.score += points
+
+    @math("score")
+    def get_score(self, value, **kwargs):
+        return value + self.score
+
+
+def populate(cluster: MessageCluster, players: int) -> int:
+    for i in range(players):
+        registry.create_and_insert(1, cluster, f"player{i}")
+    return os.getpid()
+
+
+def worker_pid(cluster: MessageCluster) -> int:
+    return os.getpid()
+
+
+def fail(cluster: MessageCluster):
+    raise ValueError("failed in worker")
+
+
+def test_cluster_pool():
+    with ClusterPool([registry], workers=2) as pool:
+        for match in range(4):
+            pool.add_cluster(match, registry)
+            pool.apply(match, populate, 2)
+        assert len(pool) == 4
+        assert sorted(pool.placement.values()) == [0, 0, 1, 1]
+        assert pool.apply(0, worker_pid) != pool.apply(1, worker_pid)
+
+        pool.emit(0, "score", 5)
+        pool.emit(1, "score", 1, wait=False)
+        assert pool.calculate(0, "score", 0) == 10
+        assert pool.calculate(1, "score", 0) == 2
+        assert pool.wrap(0)[2]["player0"] == (1, 5, {})
+
+        # moving a cluster keeps its wrapped state
+        target = 1 - pool.placement[0]
+        pool.move(0, target)
+        assert pool.placement[0] == target
+        assert pool.calculate(0, "score", 0) == 10
+        assert pool.rebalance() == 1
+        assert sorted(pool.placement.values()) == [0, 0, 1, 1]
+
+        # a cluster stays on its worker if the target worker fails to add it
+        source = pool.placement[2]
+        pool.workers[1 - source].request("add", 2, registry.name, (0, None, {}))
+        try:
+            pool.move(2, 1 - source)
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("failed moves must be raised")
+        assert pool.placement[2] == source and 2 in pool.workers[source].clusters
+        assert pool.calculate(2, "score", 0) == 0 and len(pool.wrap(2)[2]) == 2
+        pool.workers[1 - source].request("discard", 2)
+
+        try:
+            pool.calculate(5, "score", 0)
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("unknown clusters must be rejected")
+
+        try:
+            pool.apply(0, fail)
+        except ValueError as e:
+            assert str(e) == "failed in worker"
+        else:
+            raise AssertionError("errors in the workers must be raised")
+
+        wrapped = pool.remove_cluster(1)
+        assert 1 not in pool
+        assert wrapped[2]["player1"] == (1, 1, {})
+        pool.add_cluster("restored", registry, wrapped)
+        assert pool.calculate("restored", "score", 0) == 2
+
+
+if __name__ == "__main__":
+    test_cluster_pool()
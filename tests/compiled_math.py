@@ -0,0 +1,76 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("compiled_math", MessageCluster)
+
+
+@registry.register(1)
+class StrengthObject(MessageObject):
+    @math("damage", 3)
+    def add_strength(self, value, bonus, init_value, **kwargs):
+        return value + bonus + kwargs.get("extra", 0)
+
+
+@registry.register(2)
+class MultiplierObject(MessageObject):
+    @math("damage", priority=1)
+    def multiply(self, value, **kwargs):
+        return value * 2
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    strength = registry.create_and_insert(1, cluster, "strength", cast_to=StrengthObject)
+    multiplier = registry.create_and_insert(2, cluster, "multiplier", cast_to=MultiplierObject)
+    return cluster, strength, multiplier
+
+
+def test_compiled_math():
+    tree, strength, multiplier = construct_tree()
+    assert tree.calculate("damage", 1) == 8
+    tree.compile_math("damage")
+    assert tree.calculate("damage", 1) == 8
+    assert tree.calculate("damage", 1, extra=1) == 10
+    assert tree.math_storage["damage"].chain is not None
+
+    # registering a handler rebuilds the chain
+    tree.register_math("damage", lambda value, **kwargs: value - 1, limit=2, priority=2)
+    assert tree.math_storage["damage"].chain is None
+    assert tree.calculate("damage", 1) == 7
+    assert tree.calculate("damage", 1) == 7
+    # the limited handler ran out, the chain is rebuilt without it
+    assert tree.calculate("damage", 1) == 8
+
+    strength.ignore_math("damage")
+    assert tree.calculate("damage", 1) == 2
+    multiplier.cleanup()
+    assert tree.calculate("damage", 1) == 1
+
+    tree.compile_math("damage", enabled=False)
+    registry.create_and_insert(2, tree, "multiplier2")
+    assert tree.calculate("damage", 1) == 2
+    assert tree.math_storage["damage"].chain is None
+
+    # targets can be compiled before any handler is registered
+    tree.compile_math("armor")
+    assert tree.calculate("armor", 5) == 5
+    tree.register_math("armor", lambda value, **kwargs: value + 1)
+    assert tree.calculate("armor", 5) == 6
+
+    # kwargs bound to a handler are merged with the kwargs of the call the same way in both modes
+    tree.register_math("bonus", lambda value, x, **kwargs: value + x, x=5)
+    for compiled in (False, True):
+        tree.compile_math("bonus", enabled=compiled)
+        assert tree.calculate("bonus", 0) == 5
+        try:
+            tree.calculate("bonus", 0, x=2)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("kwargs of the call must not override the kwargs of a handler")
+
+
+if __name__ == "__main__":
+    test_compiled_math()
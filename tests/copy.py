@@ -25,6 +25,34 @@ class TestObject(MessageObject):
         self.data += 1
 
 
+@registry.register(2)
+class TemplateObject(MessageObject):
+    clones = 0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stats = {"hp": 10}
+
+    @property
+    def datagram(self):
+        return dict(self.stats)
+
+    @datagram.setter
+    def datagram(self, value):
+        self.stats = value
+
+    def __clone_datagram__(self, clone: "TemplateObject"):
+        TemplateObject.clones += 1
+        clone.stats = self.stats.copy()
+
+
+@registry.register(3)
+class HolderObject(MessageObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.add_child("part", TestObject(self))
+
+
 def construct_tree():
     cluster = MessageCluster(registry)
     child1 = registry.create_and_insert(1, cluster, "child", cast_to=TestObject)
@@ -46,5 +74,51 @@ def test_copies():
     assert cp.data == 3
 
 
+def test_template_copies():
+    tree, child1 = construct_tree()
+    template = registry.create_and_insert(2, tree, "template", cast_to=TemplateObject)
+    registry.create_and_insert(1, template, "weapon")
+    registry.create_and_insert(2, template["weapon"], "gem")
+
+    for i in range(3):
+        clone = template.copy_inplace(f"entity{i}")
+        assert tree[f"entity{i}"] is clone and clone.parent is tree
+        assert clone["weapon"]["gem"].parent_cluster is tree
+        assert clone.wrap() == template.wrap()
+    assert TemplateObject.clones == 6
+
+    clone["weapon"]["gem"].stats["hp"] = 5
+    assert template["weapon"]["gem"].stats["hp"] == 10
+    tree.emit("hello")
+    assert clone["weapon"].data == 1
+
+    # a copy that was not attached is adopted by the object it is added to
+    detached = clone["weapon"].copy_inplace()
+    assert detached.parent is clone and "weapon" not in detached.children
+    template.add_child("spare", detached)
+    assert detached.parent is template and template["spare"] is detached
+
+    # copies of whole subtrees live in a new cluster
+    cp = template.copy()
+    assert cp.parent_cluster is cp and cp["weapon"].parent_cluster is cp
+    assert cp.wrap() == template.wrap()
+    cp.emit("hello")
+    assert cp["weapon"].data == 2 and template["weapon"].data == 1
+
+
+def test_children_created_in_init():
+    tree, child1 = construct_tree()
+    holder = registry.create_and_insert(3, tree, "holder", cast_to=HolderObject)
+    holder["part"].data = 7
+    clone = holder.copy_inplace("holder2")
+    assert clone["part"].data == 7 and clone["part"].parent is clone
+    # the part created by __init__ is reused, so no orphaned listeners are left behind
+    assert len(tree.listener_storage["hello"]) == 3
+    tree.emit("hello")
+    assert child1.data == 1 and holder["part"].data == 8 and clone["part"].data == 8
+
+
 if __name__ == "__main__":
     test_copies()
+    test_template_copies()
+    test_children_created_in_init()
@@ -0,0 +1,108 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math, post_init
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("create_many", MessageCluster)
+
+
+@registry.register(1)
+class CountingObject(MessageObject):
+    def __init__(self, parent, value: int = 1):
+        super().__init__(parent)
+        self.value = value
+        self.ticks = 0
+
+    @listen("tick")
+    def tick(self):
+        self.ticks += 1
+
+    @math("total")
+    def total(self, value, **kwargs):
+        return value + self.value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+@registry.register(2)
+class IgnoringObject(CountingObject):
+    def __init__(self, parent, value: int = 1):
+        super().__init__(parent, value)
+        self.ignore("tick")
+
+
+@registry.register(3)
+class TickingObject(CountingObject):
+    @post_init()
+    def announce(self):
+        self.parent_cluster.emit("tick")
+
+
+SPECS = [(1, "a"), (2, "b"), (1, "c", {"value": 5}), (2, "d", {"value": 7})]
+
+
+def construct_tree(bulk: bool):
+    cluster = MessageCluster(registry)
+    if bulk:
+        children = registry.create_many(cluster, SPECS, cast_to=CountingObject)
+    else:
+        children = [
+            registry.create_and_insert(spec[0], cluster, spec[1], **(spec[2] if len(spec) > 2 else {}))
+            for spec in SPECS
+        ]
+    return cluster, children
+
+
+def test_create_many():
+    loop_tree, loop_children = construct_tree(False)
+    bulk_tree, bulk_children = construct_tree(True)
+    assert [child.parent for child in bulk_children] == [bulk_tree] * len(SPECS)
+    assert list(bulk_tree.children) == ["a", "b", "c", "d"]
+    assert bulk_tree.wrap() == loop_tree.wrap()
+    for storage in ("listener_storage", "math_storage"):
+        loop_handlers = getattr(loop_tree, storage)
+        bulk_handlers = getattr(bulk_tree, storage)
+        assert list(loop_handlers) == list(bulk_handlers)
+        for event in loop_handlers:
+            assert [obj._child_id for obj in loop_handlers[event]] == [obj._child_id for obj in bulk_handlers[event]]
+
+    loop_tree.emit("tick")
+    bulk_tree.emit("tick")
+    assert [child.ticks for child in bulk_children] == [child.ticks for child in loop_children] == [1, 0, 1, 0]
+    assert bulk_tree.calculate("total", 0) == loop_tree.calculate("total", 0) == 14
+
+
+def test_create_many_during_emit():
+    tree = MessageCluster(registry)
+    created = []
+
+    def spawn():
+        created.extend(registry.create_many(tree, [(1, f"child{i}") for i in range(3)]))
+
+    tree.listen_to("spawn", spawn)
+    tree.emit("spawn")
+    tree.emit("tick")
+    assert len(tree.children) == 3 and [child.ticks for child in created] == [1, 1, 1]
+
+
+def test_create_many_post_init_emit():
+    specs = [(3, f"child{i}") for i in range(3)]
+    for thread_safe in (False, True):
+        loop_tree = MessageCluster(registry, thread_safe=thread_safe)
+        loop_children = [registry.create_and_insert(spec[0], loop_tree, spec[1]) for spec in specs]
+        bulk_tree = MessageCluster(registry, thread_safe=thread_safe)
+        bulk_children = registry.create_many(bulk_tree, specs)
+        # every child is reached by its own event and by the events of the children created after it
+        assert [child.ticks for child in bulk_children] == [child.ticks for child in loop_children] == [3, 2, 1]
+
+
+if __name__ == "__main__":
+    test_create_many()
+    test_create_many_during_emit()
+    test_create_many_post_init_emit()
@@ -0,0 +1,112 @@
+import pickle
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("deltas", MessageCluster)
+
+
+@registry.register(1)
+class TestObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self.mark_changed()
+
+    @property
+    def datagram(self):
+        return self._value
+
+    @datagram.setter
+    def datagram(self, value):
+        self._value = value
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(10):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value=i)
+        for j in range(3):
+            registry.create_and_insert(1, zone, f"npc{j}", value=(i, j))
+    return cluster
+
+
+def test_deltas():
+    cluster = construct_tree()
+    replica = registry.unwrap(cluster.wrap())
+    cluster.track_changes()
+    assert cluster.wrap_delta() is None
+
+    cluster["zone2"]["npc1"].value = "moved"
+    cluster["zone5"].value = 50
+    cluster.remove_child("zone7")
+    new_zone = registry.create_and_insert(1, cluster, "zone10", value=10)
+    registry.create_and_insert(1, new_zone, "npc0", value=(10, 0))
+    assert cluster.has_changes and cluster["zone2"].has_changes and not cluster["zone3"].has_changes
+
+    delta = cluster.wrap_delta()
+    changed, datagram, changes, added, removed = delta
+    assert not changed and removed == ("zone7",)
+    assert set(changes) == {"zone2", "zone5"} and set(added) == {"zone10"}
+    assert changes["zone2"][2]["npc1"][:2] == (True, "moved")
+    assert not cluster.has_changes and not new_zone.has_changes
+    assert cluster.wrap_delta() is None
+
+    kept = replica["zone2"]["npc1"]
+    replica.apply_delta(pickle.loads(pickle.dumps(delta)))
+    assert replica["zone2"]["npc1"] is kept
+    assert replica.wrap() == cluster.wrap()
+
+    # changes inside an added child are sent with the child
+    child = registry.create_and_insert(1, cluster["zone3"], "npc3", value=(3, 3))
+    child.value = "changed"
+    cluster["zone3"].value = 30
+    registry.create_and_insert(1, child, "item", value="sword")
+    delta = cluster.wrap_delta(checkpoint=False)
+    assert cluster.wrap_delta() == delta
+    assert delta[2]["zone3"][3]["npc3"] == (1, "changed", {"item": (1, "sword", {})})
+    replica.apply_delta(delta)
+    assert replica.wrap() == cluster.wrap()
+
+    # later changes inside that child are still tracked
+    child["item"].value = "shield"
+    replica.apply_delta(cluster.wrap_delta())
+    assert replica["zone3"]["npc3"]["item"].value == "shield"
+
+    # replacing a child removes the old one on the other side
+    cluster.remove_child("zone4")
+    registry.create_and_insert(1, cluster, "zone4", value="fresh")
+    replica.apply_delta(cluster.wrap_delta())
+    assert replica["zone4"].value == "fresh" and not replica["zone4"].children
+    assert replica.wrap() == cluster.wrap()
+
+    # unwrapping into existing children is a change too
+    cluster["zone6"].unwrap((1, 60, {"npc0": (1, "unwrapped", {})}))
+    assert cluster["zone6"]["npc0"].has_changes
+    replica.apply_delta(cluster.wrap_delta())
+    assert replica.wrap() == cluster.wrap()
+
+    # changes are not tracked when disabled
+    cluster.track_changes(False)
+    cluster["zone1"].value = 11
+    assert not cluster.has_changes
+
+    try:
+        replica.apply_delta((False, None, {"missing": (True, 1, {}, {}, ())}, {}, ()))
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("deltas for missing children must be rejected")
+
+
+if __name__ == "__main__":
+    test_deltas()
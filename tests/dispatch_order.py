@@ -0,0 +1,65 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("dispatch_order", MessageCluster)
+
+
+@registry.register(1)
+class OrderObject(MessageObject):
+    def __init__(self, parent, name: str = "", **kwargs):
+        super().__init__(parent, **kwargs)
+        self.name = name
+
+    def record(self, log: list):
+        log.append(self.name)
+
+    def append(self, value: str, **kwargs) -> str:
+        return value + self.name
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    objects = [registry.create_and_insert(1, cluster, name, name=name) for name in "abc"]
+    return cluster, objects
+
+
+def test_dispatch_order():
+    tree, (a, b, c) = construct_tree()
+    a.listen_to("tick", a.record, priority=0)
+    b.listen_to("tick", b.record, priority=1)
+    c.listen_to("tick", c.record, priority=0)
+    for obj in (a, b, c):
+        obj.register_math("word", obj.append, priority={"a": 2, "b": 1, "c": 2}[obj.name])
+
+    log = []
+    tree.emit("tick", log)
+    assert log == ["b", "a", "c"]
+    assert tree.calculate("word", "") == "bac"
+
+    # the cached order is reused until the handlers change
+    handlers = tree.listener_storage["tick"]
+    assert handlers.ordered(reverse=True) is handlers.ordered(reverse=True)
+
+    c.listen_to("tick", c.record, priority=5)
+    log = []
+    tree.emit("tick", log)
+    assert log == ["c", "b", "a"]
+
+    b.ignore("tick")
+    log = []
+    tree.emit("tick", log)
+    assert log == ["c", "a"]
+
+    b.listen_to("tick", b.record, priority=0, limit=1)
+    log = []
+    tree.emit("tick", log)
+    tree.emit("tick", log)
+    assert log == ["c", "a", "b", "c", "a"]
+
+    a.ignore_math("word")
+    assert tree.calculate("word", "") == "bc"
+
+
+if __name__ == "__main__":
+    test_dispatch_order()
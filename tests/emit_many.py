@@ -0,0 +1,67 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("emit_many", MessageCluster)
+
+
+@registry.register(1)
+class TickObject(MessageObject):
+    def __init__(self, parent, log: list, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.log = log
+
+    @listen("tick")
+    def tick(self, value, scale=1):
+        self.log.append(("tick", value * scale))
+        if value == 1:
+            self.parent.listen_to("tick", self.late)
+        if value == 3:
+            self.ignore("tick")
+
+    def late(self, value, scale=1):
+        self.log.append(("late", value * scale))
+
+
+@registry.register(2)
+class LimitedObject(MessageObject):
+    def __init__(self, parent, log: list, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.log = log
+
+    @listen("tick", limit=2, priority=1)
+    def limited(self, value, scale=1):
+        self.log.append(("limited", value * scale))
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    log = []
+    child = registry.create_and_insert(1, cluster, "child", cast_to=TickObject, log=log)
+    registry.create_and_insert(2, cluster, "limited", log=log)
+    return cluster, child
+
+
+def test_emit_many():
+    tree, child = construct_tree()
+    for value in range(5):
+        tree.emit("tick", value, scale=10)
+    expected = child.log
+
+    tree, child = construct_tree()
+    tree.emit_many("tick", [(value,) for value in range(5)], scale=10)
+    assert child.log == expected
+    assert ("late", 20) in child.log and ("limited", 20) not in child.log and ("tick", 40) not in child.log
+
+    # nested batches defer changes exactly like nested emits do
+    tree, child = construct_tree()
+    with tree.action_lock:
+        tree.emit_many("tick", [(1,), (2,)])
+    assert child.log == [("limited", 1), ("tick", 1), ("limited", 2), ("tick", 2)]
+
+    tree.emit_many("missing", [(1,), (2,)])
+
+
+if __name__ == "__main__":
+    test_emit_many()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("trace", MessageCluster)
+
+
+@registry.register(1)
+class CascadingObject(MessageObject):
+    @listen("should_be_first")
+    def first(self):
+        self.emit("should_be_later")
+
+    @listen("should_be_later", limit=1)
+    def later(self):
+        self.calculate("damage", 1)
+
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + 1
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    registry.create_and_insert(1, cluster, "child")
+    return cluster
+
+
+def test_cascade():
+    tree = construct_tree()
+    assert tree.dump_trace() == []
+    trace = tree.enable_trace()
+    tree.emit("should_be_first")
+    records = [(entry["kind"], entry["name"], entry["levels"], entry["handler"]) for entry in tree.dump_trace()]
+    assert records == [
+        ("emit", "should_be_first", 1, None),
+        ("emit", "should_be_later", 2, None),
+        ("calculate", "damage", 3, None),
+        ("expire", "should_be_later", 2, "emit:CascadingObject.later"),
+    ]
+    assert [entry["sequence"] for entry in tree.dump_trace()] == [1, 2, 3, 4]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.json")
+        trace.export_json(path)
+        with open(path) as file:
+            assert json.load(file) == tree.dump_trace()
+
+    tree.disable_trace()
+    assert tree.dump_trace() == []
+
+
+def test_ring_buffer_and_sampling():
+    tree = construct_tree()
+    tree.enable_trace(size=4)
+    for i in range(10):
+        tree.emit(f"event{i}")
+    assert [entry["name"] for entry in tree.dump_trace()] == ["event6", "event7", "event8", "event9"]
+
+    # every fourth top-level dispatch is recorded, together with everything nested in it
+    tree.enable_trace(sample_rate=0.25)
+    for _ in range(8):
+        tree.emit("should_be_first")
+    names = [entry["name"] for entry in tree.dump_trace()]
+    assert names == ["should_be_first", "should_be_later"] * 2
+
+
+if __name__ == "__main__":
+    test_cascade()
+    test_ring_buffer_and_sampling()
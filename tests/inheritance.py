@@ -39,6 +39,28 @@ class InheritingEventObject2(BaseEventObject):
     pass
 
 
+@registry.register(4)
+class OverridingEventObject(BaseEventObject):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.ignore("magic")
+        self.post_inits = 0
+
+    def hello(self):
+        self.data += 10
+
+    @post_init()
+    def count_post_init(self):
+        self.post_inits += 1
+
+
+@registry.register(5)
+class DeepEventObject(OverridingEventObject):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.extra = 1
+
+
 def construct_tree():
     cluster = MessageCluster(registry)
     child1 = registry.create_and_insert(2, cluster, "child", cast_to=InheritingEventObject)
@@ -55,5 +77,19 @@ def test_inheritance():
     assert child1.second_data == 0 and child2.second_data == 1 and child3.second_data == 1
 
 
+def test_handler_tables():
+    tree = MessageCluster(registry)
+    child = registry.create_and_insert(4, tree, "child", cast_to=OverridingEventObject)
+    deep = registry.create_and_insert(5, tree, "deep", cast_to=DeepEventObject)
+    # post_init runs once, after the __init__ of the actual class
+    assert child.post_inits == 1 and deep.post_inits == 1 and deep.extra == 1
+    tree.emit("hello")
+    tree.emit("magic")
+    # the undecorated override keeps the inherited listener, and ignoring during __init__ works
+    assert child.data == 10 and deep.data == 10
+    assert child.second_data == 0 and deep.second_data == 0
+
+
 if __name__ == "__main__":
     test_inheritance()
+    test_handler_tables()
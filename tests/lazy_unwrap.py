@@ -0,0 +1,86 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("lazy_unwrap", MessageCluster)
+created = []
+
+
+@registry.register(1)
+class TestObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self.value = value
+        created.append(self)
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+@registry.register(2, eager=True)
+class GuardObject(TestObject):
+    @listen("alarm")
+    def on_alarm(self, log: list):
+        log.append(self.value)
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(10):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value=i)
+        for j in range(3):
+            registry.create_and_insert(1, zone, f"npc{j}", value=(i, j))
+    registry.create_and_insert(2, cluster["zone7"]["npc1"], "guard", value="guard")
+    return cluster.wrap()
+
+
+def test_lazy_unwrap():
+    wrapped = construct_tree()
+    created.clear()
+    cluster = registry.unwrap(wrapped, lazy=True)
+
+    # only the guard and its ancestors are created, so its listener works right away
+    assert [obj.value for obj in created] == [7, (7, 1), "guard"]
+    log = []
+    cluster.emit("alarm", log)
+    assert log == ["guard"]
+    assert cluster.wrap() == wrapped
+
+    # children are created on access
+    assert "zone3" in cluster and "zone3" not in cluster.children
+    assert cluster["zone3"].value == 3
+    assert "zone3" in cluster.children and not cluster["zone3"].hydrated
+    assert cluster.get("zone5").value == 5
+    assert cluster.get("missing") is None
+    assert {child_id for child_id, child in cluster["zone3"]} == {"npc0", "npc1", "npc2"}
+    assert cluster["zone3"].hydrated
+    assert len(created) == 8
+
+    # placeholders are wrapped and copied as they are
+    assert cluster.wrap() == wrapped
+    assert sorted(cluster.iter_records(), key=repr) == sorted(registry.unwrap(wrapped).iter_records(), key=repr)
+
+    # replacing and removing placeholders
+    cluster.remove_child("zone4")
+    assert "zone4" not in cluster
+    registry.create_and_insert(1, cluster, "zone6", value="new")
+    assert cluster["zone6"].value == "new" and not cluster["zone6"].children
+
+    cluster.hydrate()
+    assert cluster.hydrated and cluster["zone9"]["npc2"].hydrated
+    assert len(cluster.children) == 9
+
+    # eager unwrap is unaffected
+    created.clear()
+    registry.unwrap(wrapped)
+    assert len(created) == 41
+
+
+if __name__ == "__main__":
+    test_lazy_unwrap()
@@ -0,0 +1,89 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("math_cache", MessageCluster)
+
+
+@registry.register(1)
+class StatsObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.strength = 10
+        self.damage_calls = 0
+
+    @math("strength")
+    def get_strength(self, value, **kwargs):
+        return value + self.strength
+
+    @math("damage")
+    def get_damage(self, value, multiplier=1, **kwargs):
+        self.damage_calls += 1
+        return value + self.calculate("strength", 0) * multiplier
+
+
+@registry.register(2)
+class BuffObject(MessageObject):
+    @math("strength")
+    def buff(self, value, **kwargs):
+        return value * 2
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    stats = registry.create_and_insert(1, cluster, "stats", cast_to=StatsObject)
+    cluster.enable_math_cache(max_size=4)
+    return cluster, stats
+
+
+def test_math_cache():
+    tree, stats = construct_tree()
+    assert tree.calculate("damage", 1) == 11
+    assert tree.calculate("damage", 1) == 11
+    assert stats.damage_calls == 1
+    assert tree.calculate("damage", 1, multiplier=2) == 21
+    assert stats.damage_calls == 2
+
+    # changing the handlers of a target read during evaluation drops the result
+    with registry.temporary_object(2, tree):
+        assert tree.calculate("damage", 1) == 21
+        assert stats.damage_calls == 3
+    assert tree.calculate("damage", 1) == 11
+    assert stats.damage_calls == 4
+
+    # other state has to be marked dirty explicitly
+    stats.strength = 20
+    assert tree.calculate("damage", 1) == 11
+    stats.invalidate_math("strength")
+    assert tree.calculate("damage", 1) == 21
+    assert stats.damage_calls == 5
+
+    # limited handlers are never cached
+    tree.register_math("strength", lambda value, **kwargs: value + 100, limit=1)
+    assert tree.calculate("damage", 1) == 121
+    assert tree.calculate("damage", 1) == 21
+    assert tree.calculate("damage", 1) == 21
+    assert stats.damage_calls == 7
+
+    # least recently used results are evicted
+    for value in range(5):
+        tree.calculate("damage", value)
+    assert len(tree.cluster_state.math_cache.entries) == 4
+    damage_calls = stats.damage_calls
+    tree.calculate("damage", 4)
+    assert stats.damage_calls == damage_calls
+    tree.calculate("damage", 0)
+    assert stats.damage_calls == damage_calls + 1
+
+    # unhashable values are calculated, but not cached
+    assert tree.calculate("damage", 1, tags=["fire"]) == 21
+    assert tree.calculate("damage", 1, tags=["fire"]) == 21
+    assert stats.damage_calls == damage_calls + 3
+    stats.invalidate_math()
+    tree.disable_math_cache()
+    assert tree.calculate("damage", 1) == 21
+
+
+if __name__ == "__main__":
+    test_math_cache()
@@ -0,0 +1,88 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("path_index", MessageCluster)
+
+
+@registry.register(1)
+class Node(MessageObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # attributes of subclasses are free to use common names
+        self.path = []
+
+
+def wrapped_node(*children: str):
+    return 1, None, {child_id: (1, None, {}) for child_id in children}
+
+
+def construct_tree():
+    wrapped = (0, None, {"zone": (1, None, {"room": wrapped_node("npc", "chest")}), "other": wrapped_node("npc")})
+    return registry.unwrap(wrapped), wrapped
+
+
+def test_resolve():
+    tree, _ = construct_tree()
+    npc = tree["zone"]["room"]["npc"]
+    assert tree.resolve("zone/room/npc") is npc
+    assert tree.resolve(["zone", "room", "npc"]) is npc
+    assert tree["zone"].resolve("room/npc") is npc
+    assert tree.resolve("") is tree
+    assert npc.get_path() == "zone/room/npc" and tree.get_path() == ""
+    try:
+        tree.resolve("zone/missing")
+    except KeyError:
+        pass
+    else:
+        assert False, "missing paths raise KeyError"
+
+
+def test_index():
+    tree, _ = construct_tree()
+    tree.enable_path_index()
+    index = tree.cluster_state.path_index
+    npc = tree["zone"]["room"]["npc"]
+    assert index.paths["zone/room/npc"] is npc and tree.resolve("zone/room/npc") is npc
+    assert tree["zone"].resolve("room/npc") is npc and npc.get_path() == "zone/room/npc"
+
+    added = registry.create_and_insert(1, tree["other"], "guard")
+    registry.create_and_insert(1, added, "sword")
+    assert tree.resolve("other/guard/sword") is added["sword"]
+
+    tree["zone"].remove_child("room")
+    assert not any(path.startswith("zone/room") for path in index.paths)
+    assert npc not in index.nodes
+
+    copied = tree["other"].copy_inplace("copied", tree)
+    assert tree.resolve("copied/guard/sword") is copied["guard"]["sword"]
+
+    tree["zone"].unwrap(wrapped_node("room"))
+    assert tree.resolve("zone/room").parent is tree["zone"]
+    assert len(index.paths) == len(index.nodes) == 11
+
+    # replacing a child drops the subtree of the replaced one
+    old = tree["zone"]["room"]
+    registry.create_and_insert(1, old, "npc")
+    replacement = registry.create_and_insert(1, tree["zone"], "room")
+    assert tree.resolve("zone/room") is replacement and old.get_path() is None
+    assert "zone/room/npc" not in index.paths and len(index.paths) == len(index.nodes) == 11
+
+    tree.cleanup()
+    assert list(index.paths) == []
+
+
+def test_lazy():
+    _, wrapped = construct_tree()
+    tree = registry.unwrap(wrapped, lazy=True)
+    tree.enable_path_index()
+    assert list(tree.cluster_state.path_index.paths) == [""]
+    npc = tree.resolve("zone/room/npc")
+    assert tree.cluster_state.path_index.paths["zone/room/npc"] is npc
+    assert "zone/room" in tree.cluster_state.path_index.paths
+
+
+if __name__ == "__main__":
+    test_resolve()
+    test_index()
+    test_lazy()
@@ -0,0 +1,119 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math, post_init
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("pooling", MessageCluster)
+
+
+@registry.register(1)
+class ModifierObject(MessageObject):
+    def __init__(self, parent, bonus: int = 1):
+        super().__init__(parent)
+        self.bonus = bonus
+        self.ticks = 0
+        self.started = False
+
+    def __reset__(self, bonus: int = 1):
+        self.bonus = bonus
+        self.ticks = 0
+        self.started = False
+
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + self.bonus
+
+    @listen("tick")
+    def tick(self):
+        self.ticks += 1
+
+    @post_init()
+    def start(self):
+        self.started = True
+
+
+@registry.register(2)
+class PlainObject(MessageObject):
+    pass
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    registry.enable_pool(1, size=2)
+    return cluster
+
+
+def test_temporary_objects():
+    tree = construct_tree()
+    pool = registry.pools[1]
+    first = record = None
+    for i in range(5):
+        with registry.temporary_object(1, tree, ModifierObject, bonus=i) as modifier:
+            assert modifier.started and modifier.ticks == 0 and modifier.parent is tree
+            assert tree.calculate("damage", 10) == 10 + i
+            tree.emit("tick")
+            assert modifier.ticks == 1
+            if first is None:
+                first = modifier
+                record = tree.math_storage["damage"][modifier]
+            else:
+                # the subscription records are kept while the object is pooled
+                assert modifier is first and tree.math_storage["damage"][modifier] is record
+
+    assert pool.misses == 1 and pool.hits == 4 and [obj for obj, _ in pool.objects] == [first]
+    # pooled objects are not subscribed to anything
+    assert first.parent is None and not tree.math_storage["damage"] and tree.calculate("damage", 10) == 10
+
+
+def test_pool_size():
+    tree = construct_tree()
+    pool = registry.pools[1]
+    pool.objects.clear()
+    objects = [registry.create_and_insert(1, tree, f"child{i}") for i in range(3)]
+    for i, obj in enumerate(objects):
+        tree.remove_child(f"child{i}")
+        assert registry.release(obj) == (i < 2)
+    assert [obj for obj, _ in pool.objects] == objects[:2]
+
+    other = MessageCluster(registry)
+    reused = registry.create_and_insert(1, other, "child", bonus=3)
+    assert reused is objects[1] and reused.parent_cluster is other
+    assert other.calculate("damage", 0) == 3 and tree.calculate("damage", 0) == 0
+
+    registry.disable_pool(1)
+    assert registry.create_object(1, tree) is not objects[0]
+
+
+def test_release_during_emit():
+    tree = construct_tree()
+    pool = registry.pools[1]
+    pool.objects.clear()
+    modifier = registry.create_and_insert(1, tree, "mod")
+
+    def remove():
+        tree.remove_child("mod")
+        assert registry.release(modifier)
+
+    tree.listen_to("remove", remove)
+    tree.emit("remove")
+    assert modifier.parent is None and not tree.math_storage["damage"] and not tree.listener_storage["tick"]
+    reused = registry.create_and_insert(1, tree, "mod", bonus=4)
+    assert reused is modifier and tree.calculate("damage", 0) == 4
+    tree.emit("tick")
+    assert reused.ticks == 1
+
+
+def test_default_reset():
+    tree = construct_tree()
+    registry.enable_pool(2)
+    obj = registry.create_and_insert(2, tree, "plain")
+    assert registry.release(obj) and obj.parent is None and "plain" not in tree.children
+    assert registry.create_and_insert(2, tree, "plain") is obj and tree["plain"] is obj
+    registry.disable_pool(2)
+
+
+if __name__ == "__main__":
+    test_temporary_objects()
+    test_pool_size()
+    test_release_during_emit()
+    test_default_reset()
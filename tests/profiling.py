@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math, replace
+from pycluster.messenger.message_object import FizzleReplace, MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("profiling", MessageCluster)
+
+
+@registry.register(1)
+class ProfiledObject(MessageObject):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.ticks = 0
+
+    @listen("tick")
+    def tick(self):
+        self.ticks += 1
+
+    @listen("cascade")
+    def cascade(self):
+        self.emit("tick")
+
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + 1
+
+    @replace("attack")
+    def attack(self):
+        return FizzleReplace
+
+
+@registry.register(2)
+class ReplacingObject(MessageObject):
+    @replace("attack", priority=-1)
+    def attack(self):
+        return "replaced"
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    registry.create_many(cluster, [(1, "child1"), (1, "child2"), (2, "child3")])
+    return cluster
+
+
+def test_disabled():
+    tree = construct_tree()
+    tree.emit("tick")
+    assert tree.stats() == {}
+
+
+def test_stats():
+    tree = construct_tree()
+    tree.compile_math("damage")
+    profiler = tree.enable_profiling()
+    tree.emit("tick")
+    tree.emit("cascade")
+    tree.emit("nothing")
+    assert tree.calculate("damage", 0) == 2
+    assert tree.run_replace("attack") == (True, "replaced")
+    assert tree["child1"].ticks == 3
+
+    stats = tree.stats()
+    tick = stats["emit"]["tick"]
+    # once directly, and once for every cascading listener
+    assert tick["calls"] == 3 and tick["handlers"]["ProfiledObject.tick"]["calls"] == 6
+    assert tick["max"] <= tick["total"] and stats["emit"]["cascade"]["total"] >= stats["emit"]["cascade"]["max"]
+    assert stats["emit"]["nothing"]["calls"] == 1 and stats["emit"]["nothing"]["handlers"] == {}
+    assert stats["calculate"]["damage"]["handlers"]["ProfiledObject.damage"]["calls"] == 2
+    attack = stats["run_replace"]["attack"]
+    assert attack["calls"] == 1
+    assert attack["handlers"]["ProfiledObject.attack"]["calls"] == 2
+    assert attack["handlers"]["ReplacingObject.attack"]["calls"] == 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.json")
+        profiler.export_json(path)
+        with open(path) as file:
+            assert json.load(file)["emit"]["tick"]["calls"] == 3
+
+        path = os.path.join(directory, "stats.prom")
+        profiler.export_prometheus(path)
+        with open(path) as file:
+            text = file.read()
+        assert 'pycluster_dispatch_calls_total{kind="emit",name="tick"} 3' in text
+        assert 'pycluster_handler_calls_total{kind="calculate",name="damage",handler="ProfiledObject.damage"} 2' in text
+
+    tree.disable_profiling()
+    tree.emit("tick")
+    assert tree.stats() == {}
+
+
+if __name__ == "__main__":
+    test_disabled()
+    test_stats()
@@ -0,0 +1,57 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("root_cache", MessageCluster)
+
+
+@registry.register(1)
+class NodeObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.pings = 0
+
+    @listen("ping")
+    def ping(self):
+        self.pings += 1
+
+
+def construct_tree(depth: int):
+    cluster = MessageCluster(registry)
+    node = cluster
+    for level in range(depth):
+        node = registry.create_and_insert(1, node, f"level{level}")
+    return cluster, node
+
+
+def test_root_cache():
+    tree, leaf = construct_tree(8)
+    assert leaf.parent_cluster is tree
+    assert leaf.registry is registry
+    assert leaf.action_lock is tree.action_lock
+    assert leaf.listener_storage is tree.listener_storage
+
+    leaf.emit("ping")
+    assert leaf.pings == 1 and tree["level0"].pings == 1
+
+    # moving a subtree updates the cached root of every node below it
+    other = MessageCluster(registry)
+    subtree = tree["level0"]["level1"]
+    subtree.parent = other
+    assert subtree.parent_cluster is other
+    assert leaf.parent_cluster is other
+    assert tree["level0"].parent_cluster is tree
+
+    subtree.parent = tree["level0"]
+    assert leaf.parent_cluster is tree
+
+    # objects created under a node that was moved before they were attached
+    orphan = registry.create_object(1, subtree)
+    subtree.parent = other
+    subtree.add_child("orphan", orphan)
+    assert orphan.parent_cluster is other
+
+
+if __name__ == "__main__":
+    test_root_cache()
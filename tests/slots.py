@@ -0,0 +1,96 @@
+from pycluster.messenger.callback_dict import CallbackDefinition
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, replace, replaceable
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("slots", MessageCluster)
+
+
+@registry.register(1)
+class CompactObject(MessageObject):
+    __slots__ = ("value",)
+
+    def __init__(self, parent, value=0):
+        super().__init__(parent)
+        self.value = value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+    @listen("tick")
+    def tick(self, log: list):
+        log.append(self.value)
+
+    @replaceable("greet")
+    def greet(self):
+        return "hello"
+
+
+@registry.register(2)
+class OneTimeGreeter(MessageObject):
+    __slots__ = ()
+
+    @replace("greet", limit=1)
+    def greet(self):
+        return "hi"
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(3):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value=i)
+        registry.create_and_insert(1, zone, "npc", value=i * 10)
+    return cluster
+
+
+def test_slots():
+    tree = construct_tree()
+    zone = tree["zone1"]
+    assert not hasattr(zone, "__dict__")
+    try:
+        zone.unknown = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("slotted objects must not accept new attributes")
+
+    # slotted objects behave like any other
+    log = []
+    tree.emit("tick", log)
+    assert sorted(log) == [0, 0, 1, 2, 10, 20]
+    copy = registry.unwrap(tree.wrap(), lazy=True)
+    assert copy["zone2"]["npc"].value == 20
+    assert zone.copy_inplace("zone3").value == 1
+
+    # unlimited records are updated in place without counting
+    record = tree.listener_storage["tick"][zone]
+    assert isinstance(record, CallbackDefinition) and record.limit == -1
+    tree.emit("tick", log)
+    assert tree.listener_storage["tick"][zone] is record and record.limit == -1
+    callback, limit, args, kwargs, pass_object, priority = record
+    assert pass_object and limit == -1
+
+    # limited records count down in place
+    zone.listen_to("tock", log.append, limit=2)
+    record = tree.listener_storage["tock"][zone]
+    tree.emit("tock", "a")
+    assert record.limit == 1 and tree.listener_storage["tock"][zone] is record
+    tree.emit("tock", "b")
+    tree.emit("tock", "c")
+    assert log[-2:] == ["a", "b"] and zone not in tree.listener_storage["tock"]
+
+    # an expired replacement is removed from the object that registered it
+    greeter = registry.create_and_insert(2, tree, "greeter")
+    assert zone.greet() == "hi"
+    assert greeter not in tree.repl_storage["greet"]
+    assert zone.greet() == "hello"
+
+
+if __name__ == "__main__":
+    test_slots()
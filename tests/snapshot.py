@@ -0,0 +1,84 @@
+import os
+import tempfile
+
+from pycluster.messenger import wire_format
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+from pycluster.messenger.snapshot import Snapshot, write_snapshot
+
+registry = ObjectRegistry("snapshot", MessageCluster)
+
+
+@registry.register(1)
+class TestObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self.value = value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(10):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value=i)
+        for j in range(50):
+            npc = registry.create_and_insert(1, zone, f"npc{j}", value=(i, j))
+            registry.create_and_insert(1, npc, "item", value=f"item of {i}/{j}")
+            registry.create_and_insert(1, npc["item"], "gem", value=j * 2)
+    return cluster.wrap()
+
+
+def test_snapshot():
+    wrapped = construct_tree()
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "world.snapshot")
+        write_snapshot(file, wrapped)
+
+        with Snapshot(file, registry) as snapshot:
+            assert len(snapshot.index) == 1 + 10 + 500
+            # ids are read when they are used
+            assert len(snapshot.ids) == 10 + 50 + 2 and not snapshot.ids.cache
+            assert snapshot.read(["zone7", "npc42"]) == wrapped[2]["zone7"][2]["npc42"]
+            assert set(snapshot.ids.cache.values()) == {"item", "gem"}
+            assert snapshot.read() == wrapped
+            assert snapshot.read(["zone7", "npc42"]) == wrapped[2]["zone7"][2]["npc42"]
+            assert snapshot.read(["zone7", "npc42", "item", "gem"]) == (1, 84, {})
+            assert ("zone3",) in snapshot and ("zone3", "npc2", "item") in snapshot
+            assert ("zone11",) not in snapshot and ("zone3", "npc2", "missing") not in snapshot
+
+            npc = snapshot.unwrap(["zone7", "npc42"])
+            assert npc.value == (7, 42) and npc["item"]["gem"].value == 84
+
+            for path in (["zone11"], ["zone1", "npc99"], ["zone1", "npc1", "gem"]):
+                try:
+                    snapshot.read(path)
+                except KeyError:
+                    pass
+                else:
+                    raise AssertionError(f"missing subtree {path} must be rejected")
+
+        write_snapshot(file, wrapped, index_depth=0)
+        with Snapshot(file, registry) as snapshot:
+            assert list(snapshot.index) == [()]
+            assert snapshot.read(["zone2", "npc3"]) == wrapped[2]["zone2"][2]["npc3"]
+
+        with open(file, "wb") as stream:
+            stream.write(wire_format.encode(wrapped))
+        try:
+            Snapshot(file)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("files that are not snapshots must be rejected")
+
+
+if __name__ == "__main__":
+    test_snapshot()
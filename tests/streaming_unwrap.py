@@ -0,0 +1,83 @@
+import io
+import sys
+
+from pycluster.messenger import wire_format
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject, iter_wrapped
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("streaming_unwrap", MessageCluster)
+
+
+@registry.register(1)
+class TestObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self.value = value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(10):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value=i)
+        for j in range(3):
+            registry.create_and_insert(1, zone, f"npc{j}", value=(i, j))
+    return cluster
+
+
+def deep_records(depth: int):
+    yield 0, None, 0, None
+    for i in range(1, depth + 1):
+        yield i, "deeper", 1, i
+
+
+def test_streaming_unwrap():
+    cluster = construct_tree()
+    wrapped = cluster.wrap()
+
+    # wrapping and unwrapping record by record
+    records = list(cluster.iter_records())
+    assert records == list(iter_wrapped(wrapped))
+    assert records[:3] == [(0, None, 0, None), (1, "zone0", 1, 0), (2, "npc0", 1, (0, 0))]
+    assert registry.unwrap_stream(iter(records)).wrap() == wrapped
+    assert registry.unwrap_stream(wire_format.encode(wrapped)).wrap() == wrapped
+    assert registry.unwrap_stream(io.BytesIO(wire_format.encode(wrapped))).wrap() == wrapped
+
+    # existing children are reused
+    zone = cluster["zone3"]
+    cluster.unwrap_records([(0, None, 0, None), (1, "zone3", 1, "changed"), (1, "zone10", 1, 10)])
+    assert cluster["zone3"] is zone and zone.value == "changed"
+    assert cluster["zone10"].value == 10
+    assert zone["npc1"].value == (3, 1)
+
+    # the breadth-first unwrap still works as before
+    restored = registry.unwrap(wrapped)
+    assert restored.wrap() == wrapped
+
+    # streaming does not recurse, so the depth of the tree is not limited
+    depth = sys.getrecursionlimit() * 2
+    deep = registry.unwrap_stream(deep_records(depth))
+    node = deep
+    for _ in range(depth):
+        node = node["deeper"]
+    assert node.value == depth and not node.children
+    assert sum(1 for _ in deep.iter_records()) == depth + 1
+
+    try:
+        registry.unwrap_stream([(1, "orphan", 1, None)])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a stream without a root record must be rejected")
+
+
+if __name__ == "__main__":
+    test_streaming_unwrap()
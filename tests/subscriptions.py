@@ -0,0 +1,75 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("subscriptions", MessageCluster)
+
+
+@registry.register(1)
+class SubscribedObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.hits = 0
+
+    @listen("hit")
+    def hit(self):
+        self.hits += 1
+
+    @math("armor")
+    def armor(self, value, **kwargs):
+        return value + 1
+
+
+@registry.register(2)
+class NoisyObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        for i in range(100):
+            self.listen_to(f"noise{i}", self.noise)
+
+    def noise(self):
+        pass
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    child1 = registry.create_and_insert(1, cluster, "child", cast_to=SubscribedObject)
+    child2 = registry.create_and_insert(1, child1, "child", cast_to=SubscribedObject)
+    noisy = registry.create_and_insert(2, cluster, "noisy", cast_to=NoisyObject)
+    return cluster, child1, child2, noisy
+
+
+def test_subscriptions():
+    tree, child1, child2, noisy = construct_tree()
+    tree.emit("hit")
+    assert child1.hits == 1 and child2.hits == 1
+    assert tree.calculate("armor", 0) == 2
+
+    # only the two subscriptions of each object are queued, regardless of how many events exist
+    with tree.action_lock as lock:
+        child1.cleanup()
+        assert len(lock.callbacks) == 4
+
+    tree.emit("hit")
+    assert child1.hits == 1 and child2.hits == 1
+    assert tree.calculate("armor", 0) == 0
+    assert len(tree.listener_storage) == 101
+
+    child2.listen_to("hit", child2.hit, limit=1)
+    tree.emit("hit")
+    tree.emit("hit")
+    assert child2.hits == 2
+
+    child2.register_math("armor", child2.armor)
+    child2.ignore_math("armor")
+    with tree.action_lock as lock:
+        child2.ignore_all()
+        assert len(lock.callbacks) == 0
+
+    noisy.cleanup()
+    assert all(not handlers for handlers in tree.listener_storage.values())
+
+
+if __name__ == "__main__":
+    test_subscriptions()
@@ -0,0 +1,67 @@
+import threading
+
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import listen, math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("thread_safety", MessageCluster)
+
+
+@registry.register(1)
+class CounterObject(MessageObject):
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.count = 0
+        self.extra = 0
+
+    @listen("count")
+    def increment(self):
+        self.count += 1
+
+    def add_extra(self):
+        self.extra += 1
+
+    @math("count")
+    def get_count(self, value, **kwargs):
+        return value + self.count
+
+
+def construct_tree():
+    cluster = MessageCluster(registry, thread_safe=True)
+    counters = [registry.create_and_insert(1, cluster, f"counter{i}", cast_to=CounterObject) for i in range(8)]
+    return cluster, counters
+
+
+def test_thread_safety():
+    tree, counters = construct_tree()
+    assert tree.thread_safe
+    assert not MessageCluster(registry).thread_safe
+
+    def worker(counter: CounterObject):
+        for _ in range(500):
+            tree.emit("count")
+            counter.listen_to("extra", counter.add_extra)
+            tree.emit("extra")
+            counter.ignore("extra")
+
+    threads = [threading.Thread(target=worker, args=(counter,)) for counter in counters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(counter.count == 4000 for counter in counters)
+    assert all(500 <= counter.extra <= 4000 for counter in counters)
+    assert not tree.listener_storage["extra"]
+    assert tree.action_lock.levels == 0 and not tree.action_lock.callbacks
+
+    futures = [tree.submit_emit("count") for _ in range(100)]
+    for future in futures:
+        future.result()
+    assert tree.submit_calculate("count", 0).result() == 8 * 4100
+    tree.shutdown()
+
+
+if __name__ == "__main__":
+    test_thread_safety()
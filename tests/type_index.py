@@ -0,0 +1,74 @@
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.helpers import math
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("type_index", MessageCluster)
+
+
+@registry.register(1)
+class ZoneObject(MessageObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # attributes of subclasses are free to use common names
+        self.count = 0
+
+
+@registry.register(2)
+class CalculationObject(MessageObject):
+    @math("damage")
+    def damage(self, value, **kwargs):
+        return value + 1
+
+
+def construct_tree():
+    zone1 = (1, None, {"calc1": (2, None, {}), "calc2": (2, None, {})})
+    zone2 = (1, None, {"calc3": (2, None, {})})
+    wrapped = (0, None, {"zone1": zone1, "zone2": zone2})
+    return registry.unwrap(wrapped), wrapped
+
+
+def test_without_index():
+    tree, _ = construct_tree()
+    assert tree.find_all(2) == [tree["zone1"]["calc1"], tree["zone1"]["calc2"], tree["zone2"]["calc3"]]
+    assert tree["zone2"].count_objects(1) == 2 and tree.count_objects(0) == 1 and tree.count_objects(5) == 0
+
+
+def test_index():
+    tree, _ = construct_tree()
+    tree.enable_type_index()
+    assert tree.count_objects(2) == 3 and tree.count_objects(1) == 2 and tree.find_all(0) == [tree]
+
+    added = registry.create_and_insert(2, tree["zone2"], "calc4")
+    assert tree.count_objects(2) == 4 and tree.find_all(2)[-1] is added
+
+    tree.remove_child("zone1")
+    assert tree.count_objects(2) == 2 and tree.count_objects(1) == 1
+    assert set(tree.find_all(2)) == {tree["zone2"]["calc3"], added}
+
+    with registry.temporary_object(2, tree) as temporary:
+        assert temporary in tree.find_all(2)
+    assert tree.count_objects(2) == 2
+
+    tree["zone2"].copy_inplace("zone3", tree)
+    assert tree.count_objects(1) == 2 and tree.count_objects(2) == 4
+    assert tree.calculate("damage", 0) == 4
+
+    # replacing a child drops the subtree of the replaced one
+    registry.create_and_insert(1, tree, "zone3")
+    assert tree.count_objects(1) == 2 and tree.count_objects(2) == 2
+
+
+def test_lazy():
+    _, wrapped = construct_tree()
+    tree = registry.unwrap(wrapped, lazy=True)
+    tree.enable_type_index()
+    assert tree.count_objects(2) == 0
+    tree.hydrate()
+    assert tree.count_objects(2) == 3
+
+
+if __name__ == "__main__":
+    test_without_index()
+    test_index()
+    test_lazy()
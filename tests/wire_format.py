@@ -0,0 +1,91 @@
+import io
+import json
+
+from pycluster.messenger import wire_format
+from pycluster.messenger.cluster import MessageCluster
+from pycluster.messenger.message_object import MessageObject
+from pycluster.messenger.object_registry import ObjectRegistry
+
+registry = ObjectRegistry("wire_format", MessageCluster)
+
+
+@registry.register(1)
+class TestObject(MessageObject):
+    def __init__(self, parent, value=None):
+        super().__init__(parent)
+        self.value = value
+
+    @property
+    def datagram(self):
+        return self.value
+
+    @datagram.setter
+    def datagram(self, value):
+        self.value = value
+
+
+class JsonCodec:
+    def encode(self, datagram) -> bytes:
+        return json.dumps(datagram).encode()
+
+    def decode(self, data: bytes):
+        return json.loads(data)
+
+
+def construct_tree():
+    cluster = MessageCluster(registry)
+    for i in range(20):
+        zone = registry.create_and_insert(1, cluster, f"zone{i}", value={"name": f"zone{i}", "level": i})
+        for j in range(5):
+            registry.create_and_insert(1, zone, f"npc{j}", value=[i, j])
+        registry.create_and_insert(1, zone, "empty")
+    registry.create_and_insert(1, cluster, "big", value="x" * 200000)
+
+    node = cluster["zone0"]
+    for i in range(200):
+        node = registry.create_and_insert(1, node, "deeper")
+    return cluster
+
+
+def test_wire_format():
+    cluster = construct_tree()
+    wrapped = cluster.wrap()
+    data = wire_format.encode(wrapped)
+    assert wire_format.decode(data) == wrapped
+    assert data.count(b"npc3") == 1
+
+    lost = (-1, None, {"child": (5, 1, {})})
+    assert wire_format.decode(wire_format.encode(lost)) == lost
+
+    codec = JsonCodec()
+    json_data = wire_format.encode(wrapped, codec)
+    assert wire_format.decode(json_data, codec)[2]["zone3"][2]["npc1"] == (1, [3, 1], {})
+
+    # objects are created straight from the stream
+    stream = io.BytesIO()
+    wire_format.WireEncoder(stream).write(wrapped)
+    stream.seek(0)
+    restored = registry.unwrap_bytes(stream)
+    assert isinstance(restored, MessageCluster) and restored.registry is registry
+    assert restored["zone4"]["npc2"].value == [4, 2]
+    assert restored["big"].value == "x" * 200000
+    assert restored.wrap() == wrapped
+    assert registry.unwrap_bytes(data).wrap() == wrapped
+
+    try:
+        wire_format.decode(b"not a wrapped object")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("invalid data must be rejected")
+
+    try:
+        wire_format.decode(data[:-10])
+    except EOFError:
+        pass
+    else:
+        raise AssertionError("truncated data must be rejected")
+
+
+if __name__ == "__main__":
+    test_wire_format()